@@ -0,0 +1,315 @@
+"""
+Benchmark da cabine fotográfica (sem tela e sem câmera)
+Executa os estágios de captura, preview, composição, textura do preview e
+preparação da impressão com uma câmera falsa e molduras em vários tamanhos
+(pasta 'molduras', em PNG ou JSON, + molduras de exemplo em PNG geradas por
+criar_molduras_exemplo.py)
+e grava em JSON as latências p50/p95/p99 e o pico de memória de cada estágio
+
+Uso:
+    python benchmark.py                                  (resultado no terminal)
+    python benchmark.py --saida resultado.json
+    python benchmark.py --frames pasta_com_fotos --repeticoes 50
+    python benchmark.py --comparar resultado_anterior.json --tolerancia 0.2
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from cache_molduras import CacheMolduras
+from camera import CameraFalsa, ThreadCaptura
+from criar_molduras_exemplo import criar_molduras_exemplo
+from filtros import obter_filtro
+from imposicao import LAYOUTS, faixas_folha
+from impressao import ImpressoraVirtual, imprimir_em_faixas
+from molduras_procedurais import carregar_especificacao, e_especificacao
+from render import obter_moldura_impressao, renderizar_celula, renderizar_foto, montar_tirinha, \
+    tamanho_celula_tirinha
+
+# Valores padrão iguais aos de main.py (que não é importado para não carregar o Kivy)
+PRINT_SIZE = (2480, 3508)
+TAMANHO_FOLHA_600DPI = (4960, 7016)
+CAMERA_RESOLUTION = (1280, 720)
+TAMANHO_PREVIEW = (1080, 1080)
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo"""
+    ordenados = sorted(valores)
+    indice = max(0, int(round(p / 100.0 * len(ordenados))) - 1)
+    return ordenados[min(indice, len(ordenados) - 1)]
+
+
+def resumir(duracoes, pico_memoria):
+    """Resume as durações (em segundos) de um estágio"""
+    ms = [d * 1000.0 for d in duracoes]
+    return {
+        'amostras': len(ms),
+        'p50_ms': round(percentil(ms, 50), 3),
+        'p95_ms': round(percentil(ms, 95), 3),
+        'p99_ms': round(percentil(ms, 99), 3),
+        'media_ms': round(sum(ms) / len(ms), 3),
+        'max_ms': round(max(ms), 3),
+        'pico_memoria_mb': round(pico_memoria / (1024 * 1024), 2),
+    }
+
+
+def medir(funcao, repeticoes):
+    """Executa a função várias vezes e retorna as durações e o pico de memória alocada"""
+    tracemalloc.reset_peak()
+    inicio_memoria = tracemalloc.get_traced_memory()[0]
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes, tracemalloc.get_traced_memory()[1] - inicio_memoria
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo (None se não for possível medir)"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return round(pico / 1024 if sys.platform != 'darwin' else pico / (1024 * 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def preparar_molduras(pasta_temporaria, tamanhos):
+    """Lista as molduras da pasta 'molduras' e gera as de exemplo em cada tamanho pedido"""
+    molduras = sorted(glob.glob(os.path.join('molduras', '*.png')) +
+                      glob.glob(os.path.join('molduras', '*.json')))
+    for largura, altura in tamanhos:
+        diretorio = os.path.join(pasta_temporaria, f"molduras_{largura}x{altura}")
+        molduras.extend(criar_molduras_exemplo(diretorio, (largura, altura)))
+    return molduras
+
+
+def estagio_captura(origem, resolucao, fps, frames):
+    """Captura pela thread dedicada: atraso entre o frame chegar e o preview pegá-lo"""
+    captura = ThreadCaptura(
+        0, resolucao, fabrica=lambda *args: CameraFalsa(origem, resolucao, fps)
+    )
+    captura.iniciar()
+
+    tracemalloc.reset_peak()
+    inicio_memoria = tracemalloc.get_traced_memory()[0]
+    atrasos = []
+    custos_preview = []
+    limite = time.monotonic() + frames / float(fps) * 3 + 5
+    while len(atrasos) < frames and time.monotonic() < limite:
+        # Mesmo trabalho de CPU de CaptureScreen.update_camera (sem o envio para a GPU)
+        inicio = time.perf_counter()
+        item = captura.ultimo_frame(somente_novo=True)
+        if item is not None:
+            item[2].reshape(-1)
+            custos_preview.append(time.perf_counter() - inicio)
+            atrasos.append(time.monotonic() - item[1])
+        time.sleep(1.0 / 60.0)
+    pico_memoria = tracemalloc.get_traced_memory()[1] - inicio_memoria
+
+    captura.parar()
+    extras = {
+        'fps_real': round(captura.fps_real, 2),
+        'frames_capturados': captura.frames_capturados,
+        'frames_descartados': captura.frames_descartados,
+        'falhas_leitura': captura.falhas_leitura,
+    }
+    return atrasos, custos_preview, pico_memoria, extras
+
+
+def executar(argumentos):
+    """Executa todos os estágios e retorna o resultado em um dicionário"""
+    tamanhos = [tuple(int(v) for v in t.split('x')) for t in argumentos.tamanhos.split(',') if t]
+    estagios = {}
+    extras = {}
+    tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_cabine_') as pasta_temporaria:
+        molduras = preparar_molduras(pasta_temporaria, tamanhos)
+        camera = CameraFalsa(argumentos.frames, CAMERA_RESOLUTION, fps=0)
+        frame = camera.read()[1]
+        tamanhos_cache = {'impressao': PRINT_SIZE, 'preview': TAMANHO_PREVIEW}
+
+        # Captura e atualização do preview (thread de captura + CaptureScreen.update_camera)
+        print("[INFO] Estágio: captura", file=sys.stderr)
+        atrasos, custos_preview, pico, extras['captura'] = estagio_captura(
+            argumentos.frames, CAMERA_RESOLUTION, argumentos.fps, argumentos.repeticoes * 4
+        )
+        if atrasos:
+            estagios['captura'] = resumir(atrasos, pico)
+            estagios['preview_camera'] = resumir(custos_preview, pico)
+
+        # Preparação da moldura a frio (decodificação + máscaras), por tamanho de moldura
+        print("[INFO] Estágio: preparação das molduras", file=sys.stderr)
+        por_tamanho = {}
+        for caminho in molduras:
+            por_tamanho.setdefault(rotulo_moldura(caminho), []).append(caminho)
+        for rotulo, caminhos in sorted(por_tamanho.items()):
+            fila = list(caminhos) * argumentos.repeticoes_frio
+            duracoes, pico = medir(
+                lambda: obter_moldura_impressao(CacheMolduras(2048, tamanhos_cache), fila.pop()),
+                len(fila)
+            )
+            estagios[f'preparacao_moldura_{rotulo}'] = resumir(duracoes, pico)
+
+        # Composição de uma foto (PhotoBoothApp.processar_e_mostrar_foto), com o cache aquecido
+        print("[INFO] Estágio: composição", file=sys.stderr)
+        cache = CacheMolduras(2048, tamanhos_cache)
+        for caminho in molduras:
+            # Também cria o buffer de trabalho de cada moldura, que fica no cache
+            renderizar_foto(cache, frame, caminho)
+        # Só a última foto fica viva, como na cabine (o pico de memória é o de uma foto)
+        resultado = [None]
+        fila = list(molduras) * argumentos.repeticoes
+        duracoes, pico = medir(
+            lambda: resultado.__setitem__(0, renderizar_foto(cache, camera.read()[1], fila.pop())),
+            len(fila)
+        )
+        estagios['composicao'] = resumir(duracoes, pico)
+        foto = resultado[0]
+
+        # Filtros de cor: curvas 1D (quente) e tabela 3D (sépia), no preview ao vivo e na foto final
+        for identificador in ('quente', 'sepia'):
+            filtro = obter_filtro(identificador)
+            print(f"[INFO] Estágio: filtro {identificador}", file=sys.stderr)
+            duracoes, pico = medir(lambda: filtro.aplicar(frame, rapido=True), argumentos.repeticoes * 4)
+            estagios[f'filtro_{identificador}_preview'] = resumir(duracoes, pico)
+            duracoes, pico = medir(lambda: filtro.aplicar(frame), argumentos.repeticoes)
+            estagios[f'filtro_{identificador}_foto'] = resumir(duracoes, pico)
+
+        # Tirinha: composição das células + montagem da folha
+        print("[INFO] Estágio: tirinha", file=sys.stderr)
+        tamanho_celula = tamanho_celula_tirinha(PRINT_SIZE, 4, 2, 60)
+        duracoes, pico = medir(
+            lambda: montar_tirinha(
+                [renderizar_celula(cache, frame, molduras[0], tamanho_celula) for _ in range(4)],
+                PRINT_SIZE, 2, 60, TAMANHO_PREVIEW
+            ),
+            argumentos.repeticoes
+        )
+        estagios['tirinha'] = resumir(duracoes, pico)
+
+        # Textura do preview (PreviewScreen.mostrar_foto, sem o envio para a GPU)
+        print("[INFO] Estágio: textura do preview", file=sys.stderr)
+        duracoes, pico = medir(lambda: foto.preview.tobytes(), argumentos.repeticoes)
+        estagios['textura_preview'] = resumir(duracoes, pico)
+
+        # Preparação da impressão: página enviada em faixas para a impressora virtual, na
+        # resolução das fotos e em 600 DPI (o pico de memória não deve acompanhar a resolução)
+        contador = iter(range(10 ** 9))
+        for estagio, tamanho_folha in (('preparacao_impressao', PRINT_SIZE),
+                                       ('preparacao_impressao_600dpi', TAMANHO_FOLHA_600DPI)):
+            print(f"[INFO] Estágio: {estagio.replace('_', ' ')}", file=sys.stderr)
+            impressora = ImpressoraVirtual(tamanho_folha, os.path.join(pasta_temporaria, 'impressoes'))
+            with contextlib.redirect_stdout(sys.stderr):
+                duracoes, pico = medir(
+                    lambda: imprimir_em_faixas(
+                        impressora, f"benchmark_{next(contador)}",
+                        faixas_folha([foto.impressao], LAYOUTS['1-up'], impressora.tamanho)
+                    ),
+                    max(1, argumentos.repeticoes // 2)
+                )
+            estagios[estagio] = resumir(duracoes, pico)
+
+    tracemalloc.stop()
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'processadores': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+        },
+        'parametros': {
+            'repeticoes': argumentos.repeticoes,
+            'tamanhos_moldura': [list(t) for t in tamanhos],
+            'molduras': len(molduras),
+            'frames': argumentos.frames or 'ruido',
+            'resolucao_camera': list(CAMERA_RESOLUTION),
+            'tamanho_impressao': list(PRINT_SIZE),
+        },
+        'estagios': estagios,
+        'extras': extras,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def rotulo_moldura(caminho):
+    """Tamanho da moldura ('LxA', lendo só o cabeçalho do PNG) ou 'json_LxA' para as especificações"""
+    if e_especificacao(caminho):
+        largura, altura = carregar_especificacao(caminho)['tamanho']
+        return f"json_{largura}x{altura}"
+    with Image.open(caminho) as imagem:
+        return "{}x{}".format(*imagem.size)
+
+
+def comparar(resultado, anterior, tolerancia):
+    """Lista os estágios cujo p95 piorou mais que a tolerância em relação ao resultado anterior"""
+    regressoes = []
+    for nome, atual in resultado['estagios'].items():
+        base = anterior.get('estagios', {}).get(nome)
+        if base and base['p95_ms'] > 0 and atual['p95_ms'] > base['p95_ms'] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {base['p95_ms']:.1f} ms -> {atual['p95_ms']:.1f} ms")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da cabine fotográfica sem tela e sem câmera")
+    parser.add_argument('--saida', help="arquivo JSON de saída (padrão: terminal)")
+    parser.add_argument('--frames', help="pasta com fotos para a câmera falsa (padrão: ruído sintético)")
+    parser.add_argument('--repeticoes', type=int, default=20, help="repetições por estágio")
+    parser.add_argument('--repeticoes-frio', type=int, default=2,
+                        help="repetições da preparação de moldura a frio")
+    parser.add_argument('--fps', type=int, default=30, help="FPS da câmera falsa no estágio de captura")
+    parser.add_argument('--tamanhos', default='1240x1754,2480x3508',
+                        help="tamanhos das molduras de exemplo geradas (LxA separados por vírgula)")
+    parser.add_argument('--comparar', help="resultado anterior (JSON) para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="piora máxima aceita no p95 ao comparar (0.2 = 20%%)")
+    argumentos = parser.parse_args()
+
+    # As mensagens dos módulos vão para o stderr para não misturar com o JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        resultado = executar(argumentos)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if argumentos.saida:
+        with open(argumentos.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        print(f"[INFO] Resultado gravado em {argumentos.saida}", file=sys.stderr)
+    else:
+        print(texto)
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, 'r', encoding='utf-8') as f:
+            regressoes = comparar(resultado, json.load(f), argumentos.tolerancia)
+        for regressao in regressoes:
+            print(f"[ERRO] Regressão de desempenho - {regressao}", file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
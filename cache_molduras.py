@@ -0,0 +1,184 @@
+"""
+Cache de molduras decodificadas para o sistema de cabine fotográfica
+Cada moldura PNG é decodificada uma única vez (chave: caminho + data de modificação)
+e as variantes redimensionadas (impressão, preview, miniatura) ficam em memória,
+com descarte LRU para respeitar um limite de memória configurável.
+Molduras descritas em JSON (molduras_procedurais) são desenhadas direto em cada
+tamanho pedido e identificadas pelo hash do conteúdo da especificação
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from molduras_procedurais import carregar_especificacao, chave_conteudo, e_especificacao, renderizar_moldura
+
+
+def tamanho_imagem_bytes(imagem):
+    """Estima a memória ocupada por uma imagem PIL já decodificada"""
+    largura, altura = imagem.size
+    return largura * altura * len(imagem.getbands())
+
+
+class CacheMolduras:
+    def __init__(self, limite_memoria_mb=256, tamanhos=None):
+        # Limite total de memória das entradas (em bytes)
+        self.limite_memoria = int(limite_memoria_mb * 1024 * 1024)
+        # Tamanhos nomeados das variantes (ex.: 'impressao', 'preview', 'miniatura')
+        self.tamanhos = dict(tamanhos or {})
+        self.uso_memoria = 0
+        self._entradas = OrderedDict()
+        # Especificações JSON já lidas: caminho -> (mtime, especificação, chave do conteúdo)
+        self._especificacoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, caminho, variante=None, exato=False):
+        """Retorna a moldura em RGBA, original ou redimensionada para uma variante
+
+        A variante pode ser um nome configurado em 'tamanhos' ou uma tupla (largura, altura).
+        Com exato=False a moldura cabe no tamanho pedido mantendo a proporção.
+        """
+        caminho = os.path.abspath(caminho)
+        identidade, especificacao = self._identificar(caminho)
+
+        if variante is None:
+            return self._obter_original(caminho, identidade, especificacao)
+
+        tamanho = self._tamanho_variante(variante)
+        chave = identidade + ('variante', tamanho, exato)
+        imagem = self._buscar(chave)
+        if imagem is not None:
+            return imagem
+
+        if especificacao is not None:
+            # Desenhada direto no tamanho pedido, sem passar pelo tamanho de referência
+            imagem = renderizar_moldura(especificacao, tamanho, exato)
+        else:
+            original = self._obter_original(caminho, identidade, especificacao)
+            imagem = redimensionar_moldura(original, tamanho, exato)
+        self._guardar(chave, imagem, tamanho_imagem_bytes(imagem))
+        return imagem
+
+    def obter_derivado(self, caminho, nome, construir, variante=None, exato=False):
+        """Retorna um dado derivado da moldura (ex.: máscaras), construído uma única vez
+
+        'construir' recebe a moldura RGBA e retorna um objeto com o atributo 'nbytes'.
+        """
+        caminho = os.path.abspath(caminho)
+        identidade, _ = self._identificar(caminho)
+        tamanho = self._tamanho_variante(variante) if variante is not None else None
+        chave = identidade + ('derivado', nome, tamanho, exato)
+        valor = self._buscar(chave)
+        if valor is not None:
+            return valor
+
+        valor = construir(self.obter(caminho, variante, exato))
+        self._guardar(chave, valor, getattr(valor, 'nbytes', 0))
+        return valor
+
+    def precarregar(self, caminho, variantes=()):
+        """Decodifica a moldura (e variantes) em segundo plano"""
+        def _carregar():
+            try:
+                self.obter(caminho)
+                for variante in variantes:
+                    self.obter(caminho, variante)
+            except Exception as e:
+                print(f"[ERRO] Falha ao pré-carregar moldura {caminho}: {e}")
+
+        thread = threading.Thread(target=_carregar, daemon=True)
+        thread.start()
+        return thread
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entradas.clear()
+            self._especificacoes.clear()
+            self.uso_memoria = 0
+
+    def _tamanho_variante(self, variante):
+        """Tamanho (largura, altura) de uma variante nomeada ou informada como tupla"""
+        if isinstance(variante, str):
+            if variante not in self.tamanhos:
+                raise ValueError(f"Variante de moldura desconhecida: {variante!r}")
+            variante = self.tamanhos[variante]
+        return tuple(variante)
+
+    def _identificar(self, caminho):
+        """Identidade da moldura nas chaves do cache e a especificação, se for JSON
+
+        PNG: (caminho, mtime). JSON: (hash do conteúdo, 'conteudo'), assim especificações
+        iguais compartilham as renderizações e editar o arquivo gera novas chaves.
+        """
+        mtime = os.path.getmtime(caminho)
+        if not e_especificacao(caminho):
+            return (caminho, mtime), None
+
+        with self._lock:
+            lida = self._especificacoes.get(caminho)
+        if lida is None or lida[0] != mtime:
+            especificacao = carregar_especificacao(caminho)
+            lida = (mtime, especificacao, chave_conteudo(especificacao))
+            with self._lock:
+                self._especificacoes[caminho] = lida
+        return (lida[2], 'conteudo'), lida[1]
+
+    def _obter_original(self, caminho, identidade, especificacao=None):
+        """Decodifica (ou desenha, no tamanho de referência) a moldura apenas se ainda não estiver no cache"""
+        chave = identidade + ('original',)
+        imagem = self._buscar(chave)
+        if imagem is not None:
+            return imagem
+
+        if especificacao is not None:
+            imagem = renderizar_moldura(especificacao)
+        else:
+            with Image.open(caminho) as arquivo:
+                imagem = arquivo.convert("RGBA")
+        self._guardar(chave, imagem, tamanho_imagem_bytes(imagem))
+        return imagem
+
+    def _buscar(self, chave):
+        """Busca uma entrada e a marca como usada recentemente"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada[0]
+
+    def _guardar(self, chave, valor, tamanho_bytes):
+        """Guarda uma entrada e descarta as menos usadas se passar do limite"""
+        with self._lock:
+            # Versões antigas do mesmo arquivo (mtime diferente) não serão mais usadas;
+            # as de especificações JSON (chave pelo conteúdo) saem pelo descarte LRU
+            caminho, mtime = chave[0], chave[1]
+            for antiga in [c for c in self._entradas if c[0] == caminho and c[1] != mtime]:
+                self.uso_memoria -= self._entradas.pop(antiga)[1]
+
+            if chave in self._entradas:
+                self.uso_memoria -= self._entradas.pop(chave)[1]
+            self._entradas[chave] = (valor, tamanho_bytes)
+            self.uso_memoria += tamanho_bytes
+
+            # Descarta as entradas mais antigas, mas nunca a que acabou de entrar
+            while self.uso_memoria > self.limite_memoria and len(self._entradas) > 1:
+                _, (_, tamanho_removido) = self._entradas.popitem(last=False)
+                self.uso_memoria -= tamanho_removido
+
+
+def redimensionar_moldura(moldura, tamanho, exato=False):
+    """Redimensiona a moldura para o tamanho pedido (exato ou mantendo a proporção)"""
+    largura, altura = moldura.size
+    if exato:
+        novo_tamanho = (int(tamanho[0]), int(tamanho[1]))
+    else:
+        ratio = min(tamanho[0] / largura, tamanho[1] / altura)
+        novo_tamanho = (max(1, int(largura * ratio)), max(1, int(altura * ratio)))
+
+    if novo_tamanho == moldura.size:
+        return moldura
+    return moldura.resize(novo_tamanho, Image.Resampling.LANCZOS)
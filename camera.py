@@ -0,0 +1,487 @@
+"""
+Captura de vídeo da cabine fotográfica
+Uma thread dedicada é dona do cv2.VideoCapture e guarda os frames mais recentes em
+um pequeno buffer circular com data/hora, para que a interface nunca fique
+bloqueada esperando a câmera. A câmera fica aberta durante toda a execução: a
+captura é pausada e retomada entre os convidados e, se o dispositivo sumir, a
+thread reconecta sozinha. Ao abrir, a câmera é negociada: testa os formatos
+(MJPEG primeiro), confere a resolução e o FPS realmente entregues e pode usar uma
+resolução menor no preview, trocando para a resolução cheia na hora da foto.
+Inclui uma câmera falsa, com modos configuráveis, para testes sem hardware
+"""
+
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Formatos tentados na negociação, em ordem de preferência. Com MJPEG a maioria das
+# webcams USB entrega 30 FPS em alta resolução; em YUY2 (sem compressão) cai para 5-10 FPS
+FORMATOS_PREFERIDOS = ('MJPG', 'YUY2')
+
+# Modos de uma webcam USB típica (largura, altura, fps, formato), para a câmera falsa
+MODOS_WEBCAM_USB = [
+    (1920, 1080, 30, 'MJPG'), (1280, 720, 30, 'MJPG'), (640, 480, 30, 'MJPG'),
+    (1920, 1080, 5, 'YUY2'), (1280, 720, 10, 'YUY2'), (640, 480, 30, 'YUY2'),
+]
+
+# Tempo sem nenhum frame lido até considerar que a câmera foi desconectada
+TEMPO_SEM_FRAMES = 2.0
+# Espera máxima entre as tentativas de reabrir a câmera
+ESPERA_MAXIMA_RECONEXAO = 10.0
+
+
+def codificar_fourcc(formato):
+    return cv2.VideoWriter_fourcc(*formato)
+
+
+def decodificar_fourcc(valor):
+    """Converte o valor de CAP_PROP_FOURCC no texto do formato (ex.: 'MJPG')"""
+    valor = int(valor)
+    return ''.join(chr((valor >> 8 * i) & 0xFF) for i in range(4)).strip('\x00')
+
+
+def verificar_modo(camera, quadros_teste=5):
+    """Lê alguns frames e retorna o modo realmente entregue pela câmera (ou None se não ler)
+
+    A resolução vem do próprio frame (o driver pode responder ao get() com o valor pedido
+    e entregar outro) e o FPS é medido, além do informado pelo driver.
+    """
+    frame = None
+    inicio = None
+    lidos = 0
+    for _ in range(max(1, quadros_teste)):
+        ret, frame_lido = camera.read()
+        if not ret:
+            continue
+        frame = frame_lido
+        lidos += 1
+        if inicio is None:
+            # O primeiro frame depois de trocar o modo costuma demorar; mede a partir dele
+            inicio = time.monotonic()
+    if frame is None:
+        return None
+
+    duracao = time.monotonic() - inicio
+    return {
+        'largura': frame.shape[1],
+        'altura': frame.shape[0],
+        'formato': decodificar_fourcc(camera.get(cv2.CAP_PROP_FOURCC)),
+        'fps': camera.get(cv2.CAP_PROP_FPS),
+        'fps_medido': (lidos - 1) / duracao if lidos > 1 and duracao > 0 else None,
+    }
+
+
+def aplicar_modo(camera, resolucao, fps, formato):
+    """Pede formato, resolução e FPS à câmera (o formato antes, como o DirectShow exige)"""
+    camera.set(cv2.CAP_PROP_FOURCC, codificar_fourcc(formato))
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, resolucao[0])
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, resolucao[1])
+    camera.set(cv2.CAP_PROP_FPS, fps)
+
+
+def negociar_modo(camera, resolucao, fps=30, formatos=FORMATOS_PREFERIDOS, quadros_teste=5):
+    """Sonda os formatos na resolução pedida e deixa a câmera no melhor modo encontrado
+
+    Fica com o primeiro formato que entrega a resolução pedida com pelo menos 80% do
+    FPS pedido; se nenhum entregar, usa o que chegou mais perto (resolução certa
+    primeiro, depois FPS). Retorna o modo verificado (com o 'formato_pedido' e o
+    'tamanho' entregue) ou None se a câmera não ler.
+    """
+    def pontuacao(modo):
+        resolucao_certa = modo['tamanho'] == tuple(resolucao)
+        fps_entregue = modo['fps_medido'] if modo['fps_medido'] is not None else modo['fps']
+        return (resolucao_certa, min(fps_entregue or 0, fps), modo['largura'] * modo['altura'])
+
+    melhor = None
+    for formato in formatos:
+        aplicar_modo(camera, resolucao, fps, formato)
+        modo = verificar_modo(camera, quadros_teste)
+        if modo is None:
+            continue
+        modo['formato_pedido'] = formato
+        modo['tamanho'] = (modo['largura'], modo['altura'])
+        if melhor is None or pontuacao(modo) > pontuacao(melhor):
+            melhor = modo
+        resolucao_certa, fps_entregue, _ = pontuacao(modo)
+        if resolucao_certa and fps_entregue >= fps * 0.8:
+            break
+
+    if melhor is not None and melhor['formato_pedido'] != formato:
+        # O último formato testado não foi o escolhido: volta para o melhor
+        aplicar_modo(camera, resolucao, fps, melhor['formato_pedido'])
+    return melhor
+
+
+class ThreadCaptura:
+    def __init__(self, camera_id, resolucao, api=cv2.CAP_DSHOW, tamanho_buffer=8, fabrica=cv2.VideoCapture,
+                 metricas=None, resolucao_preview=None, fps=30, formatos=FORMATOS_PREFERIDOS):
+        self.camera_id = camera_id
+        # Resolução da foto; o preview pode usar uma resolução menor (None = a mesma)
+        self.resolucao = tuple(resolucao)
+        self.resolucao_preview = tuple(resolucao_preview or resolucao)
+        self.fps = fps
+        self.formatos = formatos
+        self.api = api
+        # Cria o objeto de captura (cv2.VideoCapture ou uma CameraFalsa para testes)
+        self.fabrica = fabrica
+        # Registro opcional do tempo de abertura e dos frames descartados (metricas.Metricas)
+        self.metricas = metricas
+
+        # Buffer circular de (sequência, instante, frame), protegido por lock
+        self._frames = deque(maxlen=tamanho_buffer)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ativa = False
+        self._pausada = False
+        self._sequencia = 0
+        self._ultima_consumida = 0
+        # Resolução pedida pela interface; a troca é feita pela thread, dona da câmera
+        self._resolucao_pedida = self.resolucao_preview
+        # Modo negociado para cada resolução usada (preview e foto)
+        self._modos = {}
+
+        # Contadores expostos para diagnóstico
+        self.aberta = False
+        self.modo = None
+        self.reconexoes = 0
+        self.frames_capturados = 0
+        self.frames_descartados = 0
+        self.falhas_leitura = 0
+        self.fps_real = 0.0
+
+    def iniciar(self, pausada=False):
+        """Inicia a thread de captura (a câmera é aberta dentro dela)
+
+        Com pausada=True a câmera é aberta e negociada em segundo plano, mas só começa
+        a entregar frames depois de retomar().
+        """
+        if self._thread is not None:
+            return
+        self._ativa = True
+        self._pausada = pausada
+        self._thread = threading.Thread(target=self._executar, name='captura', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Para a thread de captura e libera a câmera"""
+        self._ativa = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            self._frames.clear()
+
+    def pausar(self):
+        """Para de ler frames sem liberar a câmera"""
+        self._pausada = True
+
+    def retomar(self):
+        """Volta a ler frames, no modo de preview e sem frames antigos no buffer"""
+        with self._lock:
+            self._frames.clear()
+            # Frames jogados fora na pausa não foram substituídos sem entrega: não contam como descartados
+            self._ultima_consumida = self._sequencia
+        self.usar_modo_preview()
+        self._pausada = False
+
+    def usar_modo_foto(self):
+        """Passa a capturar na resolução da foto (chamar um pouco antes do disparo)"""
+        self._resolucao_pedida = self.resolucao
+
+    def usar_modo_preview(self):
+        """Volta a capturar na resolução do preview"""
+        self._resolucao_pedida = self.resolucao_preview
+
+    def ultimo_frame(self, somente_novo=False):
+        """Retorna (sequência, instante, frame) do frame mais recente
+
+        Com somente_novo=True retorna None se o frame mais recente já foi entregue antes.
+        Frames que chegaram e foram substituídos sem serem entregues contam como descartados.
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            item = self._frames[-1]
+            sequencia = item[0]
+            if sequencia <= self._ultima_consumida:
+                return None if somente_novo else item
+            descartados = sequencia - self._ultima_consumida - 1 if self._ultima_consumida else 0
+            self.frames_descartados += descartados
+            self._ultima_consumida = sequencia
+        if self.metricas is not None:
+            self.metricas.incrementar('frames_descartados', descartados)
+        return item
+
+    def frame_mais_proximo(self, instante, resolucao=None):
+        """Retorna (sequência, instante, frame) do frame capturado mais perto do instante (time.monotonic)
+
+        Com resolucao, prefere os frames do modo negociado para ela (ex.: os da foto
+        depois de usar_modo_foto); se ainda não houver nenhum, considera todos.
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            candidatos = list(self._frames)
+        if resolucao is not None:
+            modo = self._modos.get(tuple(resolucao))
+            tamanho = modo['tamanho'] if modo is not None else tuple(resolucao)
+            candidatos = [item for item in candidatos if item[2].shape[1::-1] == tamanho] or candidatos
+        return min(candidatos, key=lambda item: abs(item[1] - instante))
+
+    def _abrir(self):
+        """Abre a câmera e negocia os modos de foto e de preview"""
+        camera = self.fabrica(self.camera_id, self.api)
+        if not camera.isOpened():
+            print("[ERRO] Não foi possível abrir a câmera.")
+            return None
+
+        # O preview é negociado por último, para a captura já começar nele
+        resolucoes = [self.resolucao]
+        if self.resolucao_preview != self.resolucao:
+            resolucoes.append(self.resolucao_preview)
+        for resolucao in resolucoes:
+            modo = negociar_modo(camera, resolucao, self.fps, self.formatos)
+            if modo is None:
+                print("[ERRO] A câmera abriu mas não entregou frames.")
+                camera.release()
+                return None
+            self._modos[resolucao] = modo
+            fps_medido = f", {modo['fps_medido']:.1f} medidos" if modo['fps_medido'] else ""
+            print(f"[INFO] Câmera negociada: {modo['largura']}x{modo['altura']} {modo['formato'] or '?'} "
+                  f"a {modo['fps']:.0f} FPS{fps_medido}")
+            if modo['tamanho'] != resolucao:
+                print(f"[AVISO] A câmera entregou {modo['largura']}x{modo['altura']} "
+                      f"em vez de {resolucao[0]}x{resolucao[1]}")
+
+        self.modo = self._modos[self.resolucao_preview]
+        return camera
+
+    def _trocar_modo(self, camera, resolucao):
+        """Troca entre os modos já negociados de preview e de foto (na thread da câmera)"""
+        modo = self._modos[resolucao]
+        aplicar_modo(camera, resolucao, self.fps, modo['formato_pedido'])
+        self.modo = modo
+        print(f"[INFO] Câmera em {modo['largura']}x{modo['altura']}")
+
+    def _conectar(self):
+        """Abre e negocia a câmera, registrando quanto tempo levou (None se falhar)"""
+        inicio = time.monotonic()
+        try:
+            camera = self._abrir()
+        except Exception as e:
+            print(f"[ERRO] Falha ao configurar câmera: {e}")
+            camera = None
+        if self.metricas is not None:
+            self.metricas.registrar('abertura_camera', time.monotonic() - inicio)
+        return camera
+
+    def _executar(self):
+        """Laço da thread: mantém a câmera aberta, reconectando se ela sumir"""
+        espera = 1.0
+        while self._ativa:
+            camera = self._conectar()
+            if camera is None:
+                print(f"[AVISO] Nova tentativa de abrir a câmera em {espera:.0f}s")
+                self._aguardar(espera)
+                espera = min(espera * 2, ESPERA_MAXIMA_RECONEXAO)
+                continue
+
+            espera = 1.0
+            try:
+                self._ler(camera)
+            except Exception as e:
+                print(f"[ERRO] Falha na leitura da câmera: {e}")
+            if self._ativa:
+                self.reconexoes += 1
+                if self.metricas is not None:
+                    self.metricas.incrementar('reconexoes_camera')
+                print("[AVISO] A câmera parou de responder; reconectando...")
+
+    def _aguardar(self, segundos):
+        """Espera sem atrasar o encerramento da thread"""
+        limite = time.monotonic() + segundos
+        while self._ativa and time.monotonic() < limite:
+            time.sleep(0.05)
+
+    def _ler(self, camera):
+        """Lê a câmera continuamente e guarda os frames no buffer
+
+        Retorna quando a captura é parada ou quando a câmera fica TEMPO_SEM_FRAMES
+        sem entregar nenhum frame (dispositivo desconectado).
+        """
+        self.aberta = True
+        resolucao_atual = self.resolucao_preview
+        estava_pausada = False
+        ultimo_frame = time.monotonic()
+        inicio_janela = ultimo_frame
+        frames_janela = 0
+        try:
+            while self._ativa:
+                if self._pausada:
+                    # A câmera continua aberta, só não é lida
+                    estava_pausada = True
+                    time.sleep(0.05)
+                    continue
+                if estava_pausada:
+                    # Descarta o frame que o driver guardou durante a pausa
+                    estava_pausada = False
+                    camera.grab()
+                    ultimo_frame = inicio_janela = time.monotonic()
+                    frames_janela = 0
+
+                if self._resolucao_pedida != resolucao_atual:
+                    resolucao_atual = self._resolucao_pedida
+                    self._trocar_modo(camera, resolucao_atual)
+
+                ret, frame = camera.read()
+                agora = time.monotonic()
+                if not ret:
+                    self.falhas_leitura += 1
+                    if agora - ultimo_frame > TEMPO_SEM_FRAMES:
+                        return
+                    time.sleep(0.01)
+                    continue
+
+                ultimo_frame = agora
+                with self._lock:
+                    self._sequencia += 1
+                    self._frames.append((self._sequencia, agora, frame))
+                self.frames_capturados += 1
+
+                # FPS real medido em janelas de um segundo
+                frames_janela += 1
+                if agora - inicio_janela >= 1.0:
+                    self.fps_real = frames_janela / (agora - inicio_janela)
+                    inicio_janela = agora
+                    frames_janela = 0
+        finally:
+            camera.release()
+            self.aberta = False
+            print("[INFO] Câmera liberada.")
+
+
+class CameraFalsa:
+    """Substituto do cv2.VideoCapture para testes e benchmarks sem câmera
+
+    Entrega, em ciclo, os frames de uma lista de arquivos de imagem (ou de uma pasta)
+    ou, sem origem, frames de ruído sintético, respeitando o FPS do modo atual.
+    Como um driver real, só aceita os modos da lista (largura, altura, fps, formato)
+    e, a cada pedido, fica com o modo suportado mais próximo dele (ex.: MODOS_WEBCAM_USB).
+    Sem modos, suporta apenas a resolução e o FPS informados, em MJPG e YUY2.
+    """
+
+    def __init__(self, origem=None, resolucao=(1280, 720), fps=30, semente=0, modos=None):
+        self.resolucao = tuple(resolucao)
+        self.fps = fps
+        self.semente = semente
+        self.modos = modos or [
+            (self.resolucao[0], self.resolucao[1], fps, formato) for formato in FORMATOS_PREFERIDOS
+        ]
+        self.modo = self.modos[0]
+        self._pedido = {'largura': self.modo[0], 'altura': self.modo[1], 'fps': self.modo[2], 'formato': None}
+        self._frames = self._carregar(origem)
+        self._redimensionados = {}
+        self._indice = 0
+        self._proximo_instante = None
+        self._aberta = True
+        self.leituras = 0
+
+    def _carregar(self, origem):
+        """Carrega e redimensiona os frames de origem (ou gera ruído)"""
+        if origem is None:
+            gerador = np.random.default_rng(self.semente)
+            return [
+                gerador.integers(0, 256, (self.resolucao[1], self.resolucao[0], 3), dtype=np.uint8)
+                for _ in range(4)
+            ]
+
+        if isinstance(origem, str) and os.path.isdir(origem):
+            origem = sorted(
+                glob.glob(os.path.join(origem, '*.jpg')) + glob.glob(os.path.join(origem, '*.png'))
+            )
+        frames = []
+        for arquivo in origem:
+            imagem = cv2.imread(arquivo, cv2.IMREAD_COLOR)
+            if imagem is not None:
+                frames.append(cv2.resize(imagem, self.resolucao, interpolation=cv2.INTER_AREA))
+        if not frames:
+            raise ValueError(f"Nenhum frame encontrado em {origem}")
+        return frames
+
+    def _escolher_modo(self):
+        """Modo suportado mais próximo do pedido (formato, depois resolução, depois FPS)"""
+        pedido = self._pedido
+        candidatos = [m for m in self.modos if m[3] == pedido['formato']] or self.modos
+        self.modo = min(candidatos, key=lambda m: (
+            abs(m[0] - pedido['largura']) + abs(m[1] - pedido['altura']),
+            abs(m[2] - pedido['fps']),
+        ))
+
+    def _frame_no_modo(self, indice):
+        """Frame de origem na resolução do modo atual"""
+        tamanho = (self.modo[0], self.modo[1])
+        if tamanho == self.resolucao:
+            return self._frames[indice]
+        chave = (indice, tamanho)
+        if chave not in self._redimensionados:
+            self._redimensionados[chave] = cv2.resize(self._frames[indice], tamanho, interpolation=cv2.INTER_AREA)
+        return self._redimensionados[chave]
+
+    def isOpened(self):
+        return self._aberta
+
+    def read(self):
+        """Entrega o próximo frame no ritmo do FPS do modo atual"""
+        if not self._aberta:
+            return False, None
+        fps = self.modo[2]
+        if fps:
+            agora = time.monotonic()
+            if self._proximo_instante is None:
+                self._proximo_instante = agora
+            espera = self._proximo_instante - agora
+            if espera > 0:
+                time.sleep(espera)
+            self._proximo_instante = max(self._proximo_instante, agora) + 1.0 / fps
+
+        # Cada leitura devolve um array novo, como o cv2.VideoCapture
+        frame = self._frame_no_modo(self._indice % len(self._frames)).copy()
+        self._indice += 1
+        self.leituras += 1
+        return True, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def set(self, propriedade, valor):
+        if propriedade == cv2.CAP_PROP_FRAME_WIDTH:
+            self._pedido['largura'] = int(valor)
+        elif propriedade == cv2.CAP_PROP_FRAME_HEIGHT:
+            self._pedido['altura'] = int(valor)
+        elif propriedade == cv2.CAP_PROP_FPS:
+            self._pedido['fps'] = float(valor)
+        elif propriedade == cv2.CAP_PROP_FOURCC:
+            self._pedido['formato'] = decodificar_fourcc(valor)
+        else:
+            return False
+        self._escolher_modo()
+        return True
+
+    def get(self, propriedade):
+        if propriedade == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.modo[0])
+        if propriedade == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.modo[1])
+        if propriedade == cv2.CAP_PROP_FPS:
+            return float(self.modo[2] or 0)
+        if propriedade == cv2.CAP_PROP_FOURCC:
+            return float(codificar_fourcc(self.modo[3]))
+        return 0.0
+
+    def release(self):
+        self._aberta = False
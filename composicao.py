@@ -0,0 +1,186 @@
+"""
+Motor de composição da cabine fotográfica
+Trabalha diretamente sobre o frame BGR da câmera (ndarray do OpenCV): a janela
+transparente da moldura é detectada e pré-multiplicada pelo alfa uma única vez,
+e cada foto é recortada para a janela e mesclada em uma única passada vetorizada
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+# Pixels com alfa abaixo deste valor são considerados parte da janela transparente
+LIMIAR_JANELA = 128
+
+
+class MolduraPreparada:
+    """Dados pré-calculados de uma moldura RGBA para a composição vetorizada"""
+
+    def __init__(self, moldura_rgba):
+        rgba = np.asarray(moldura_rgba)
+        alpha = rgba[:, :, 3:4]
+
+        self.largura = rgba.shape[1]
+        self.altura = rgba.shape[0]
+
+        # Resultado nas áreas sem foto: a cor da moldura onde ela existe e branco no resto
+        # (mesmo resultado do alpha_composite sobre fundo transparente + convert("RGB"))
+        self.base = np.full((self.altura, self.largura, 3), 255, dtype=np.uint8)
+        np.copyto(self.base, rgba[:, :, 2::-1], where=alpha > 0)
+
+        # Janela transparente onde a foto aparece (retângulo envolvente + máscara)
+        self.janela, self.mascara = detectar_janela(alpha[:, :, 0])
+        x, y, largura, altura = self.janela
+        area = (slice(y, y + altura), slice(x, x + largura))
+        mascara = self.mascara[:, :, np.newaxis]
+
+        # Dentro da janela: cor da moldura (BGR) já multiplicada pelo alfa e o peso da foto.
+        # Fora da máscara a foto não aparece e o resultado é a própria base.
+        alpha_janela = alpha[area].astype(np.uint16)
+        self.frente = np.where(
+            mascara,
+            rgba[area][:, :, 2::-1] * alpha_janela,
+            self.base[area].astype(np.uint16) * 255,
+        ).astype(np.uint16)
+        self.inverso = np.where(mascara, 255 - alpha_janela, 0).astype(np.uint16)
+
+        self.nbytes = (self.frente.nbytes + self.inverso.nbytes
+                       + self.base.nbytes + self.mascara.nbytes)
+
+        # Buffer de trabalho reaproveitado entre as fotos (criado na primeira composição)
+        self._trabalho = None
+        self._lock = threading.Lock()
+
+    @property
+    def tamanho(self):
+        return (self.largura, self.altura)
+
+    def novo_buffer(self):
+        """Cria um buffer de saída já preenchido com a moldura nas áreas sem foto"""
+        return self.base.copy()
+
+    def _buffer_trabalho(self):
+        """Retorna o buffer uint16 usado na mescla da janela"""
+        if self._trabalho is None:
+            self._trabalho = np.empty(self.frente.shape, dtype=np.uint16)
+        return self._trabalho
+
+
+def compor(frame_bgr, preparada, saida=None):
+    """Aplica a moldura preparada sobre o frame BGR da câmera e retorna a foto final (BGR)
+
+    Se 'saida' for informado, deve ser um buffer criado por preparada.novo_buffer().
+    """
+    if saida is None:
+        saida = preparada.novo_buffer()
+
+    x, y, largura, altura = preparada.janela
+
+    # Recorta a foto na proporção da janela e redimensiona só essa parte
+    rx, ry, rlargura, raltura = recorte_cobrir(frame_bgr.shape[1], frame_bgr.shape[0], largura, altura)
+    foto = cv2.resize(
+        frame_bgr[ry:ry + raltura, rx:rx + rlargura],
+        (largura, altura),
+        interpolation=cv2.INTER_LANCZOS4,
+    )
+
+    area = (slice(y, y + altura), slice(x, x + largura))
+    with preparada._lock:
+        trabalho = preparada._buffer_trabalho()
+        # saida = (foto * (255 - alfa) + moldura * alfa) / 255, apenas dentro da janela
+        np.multiply(foto, preparada.inverso, out=trabalho)
+        np.add(trabalho, preparada.frente, out=trabalho)
+        _dividir_por_255(trabalho, saida[area])
+
+    return saida
+
+
+def camada_sobreposicao(preparada):
+    """Moldura em RGBA para desenhar por cima da foto com a mesma mescla de compor()
+
+    Dentro da máscara da janela o alfa é o da moldura; fora dela a camada é opaca e
+    tem a cor da base (moldura ou branco), exatamente como na foto final.
+    """
+    camada = np.empty((preparada.altura, preparada.largura, 4), dtype=np.uint8)
+    camada[:, :, :3] = preparada.base[:, :, ::-1]
+    camada[:, :, 3] = 255
+    x, y, largura, altura = preparada.janela
+    camada[y:y + altura, x:x + largura, 3] = 255 - preparada.inverso[:, :, 0]
+    return camada
+
+
+def detectar_janela(alpha):
+    """Encontra a janela transparente da moldura a partir do canal alfa
+
+    Retorna o retângulo (x, y, largura, altura) e a máscara booleana da janela dentro dele.
+    A janela é a região transparente que contém o centro ou, se não houver, a maior delas.
+    """
+    altura_total, largura_total = alpha.shape
+    transparente = (alpha < LIMIAR_JANELA).astype(np.uint8)
+    total, rotulos, estatisticas, _ = cv2.connectedComponentsWithStats(transparente, connectivity=4)
+
+    if total <= 1:
+        # Moldura sem área transparente: a foto ocupa a moldura inteira
+        print("[AVISO] Moldura sem área transparente; usando a moldura inteira como janela")
+        return (0, 0, largura_total, altura_total), np.ones((altura_total, largura_total), dtype=bool)
+
+    rotulo = rotulos[altura_total // 2, largura_total // 2]
+    if rotulo == 0:
+        rotulo = 1 + int(np.argmax(estatisticas[1:, cv2.CC_STAT_AREA]))
+
+    # Dilata a máscara para incluir as bordas suavizadas (antialiasing) da moldura
+    mascara = (rotulos == rotulo).astype(np.uint8)
+    mascara = cv2.dilate(mascara, np.ones((3, 3), dtype=np.uint8), iterations=2)
+
+    x, y, largura, altura = cv2.boundingRect(mascara)
+    return (x, y, largura, altura), mascara[y:y + altura, x:x + largura].astype(bool)
+
+
+def recorte_cobrir(largura_foto, altura_foto, largura_destino, altura_destino):
+    """Calcula o recorte central da foto que cobre o destino mantendo a proporção"""
+    ratio = max(largura_destino / largura_foto, altura_destino / altura_foto)
+    largura = min(largura_foto, max(1, int(round(largura_destino / ratio))))
+    altura = min(altura_foto, max(1, int(round(altura_destino / ratio))))
+    x = (largura_foto - largura) // 2
+    y = (altura_foto - altura) // 2
+    return x, y, largura, altura
+
+
+def celulas_grade(tamanho, quantidade, colunas, margem):
+    """Calcula os retângulos (x, y, largura, altura) das células de uma grade na folha"""
+    linhas = -(-quantidade // colunas)
+    largura = (tamanho[0] - margem * (colunas + 1)) // colunas
+    altura = (tamanho[1] - margem * (linhas + 1)) // linhas
+    return [
+        (margem + (i % colunas) * (largura + margem), margem + (i // colunas) * (altura + margem), largura, altura)
+        for i in range(quantidade)
+    ]
+
+
+def montar_grade(fotos, tamanho, colunas, margem, saida=None):
+    """Monta as fotos (BGR) em uma grade sobre fundo branco, centralizando cada uma na sua célula"""
+    if saida is None:
+        saida = np.full((tamanho[1], tamanho[0], 3), 255, dtype=np.uint8)
+
+    for foto, (x, y, largura, altura) in zip(fotos, celulas_grade(tamanho, len(fotos), colunas, margem)):
+        altura_foto, largura_foto = foto.shape[:2]
+        if largura_foto > largura or altura_foto > altura:
+            # A foto não cabe na célula: reduz mantendo a proporção
+            ratio = min(largura / largura_foto, altura / altura_foto)
+            foto = cv2.resize(foto, (max(1, int(largura_foto * ratio)), max(1, int(altura_foto * ratio))),
+                              interpolation=cv2.INTER_AREA)
+            altura_foto, largura_foto = foto.shape[:2]
+        px = x + (largura - largura_foto) // 2
+        py = y + (altura - altura_foto) // 2
+        saida[py:py + altura_foto, px:px + largura_foto] = foto
+
+    return saida
+
+
+def _dividir_por_255(valores, saida):
+    """Divide valores uint16 por 255 com arredondamento, gravando em um buffer uint8"""
+    np.add(valores, 127, out=valores)
+    np.floor_divide(valores, 255, out=valores)
+    np.copyto(saida, valores, casting='unsafe')
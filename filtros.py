@@ -0,0 +1,239 @@
+"""
+Filtros de cor das fotos da cabine
+Cada filtro é uma tabela de consulta calculada uma única vez: 1D (uma curva por canal,
+aplicada com cv2.LUT) ou 3D (cor de entrada -> cor de saída, para P&B, sépia e as
+gradações de cor da marca em arquivos .cube). No preview ao vivo a tabela 3D é
+consultada pelo vizinho mais próximo em uma grade de 64 níveis por canal (um índice por
+pixel e uma única busca no NumPy); na foto final ela é interpolada (trilinear) a partir
+da tabela original
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# Filtros prontos (identificador: nome no botão); os .cube da pasta de filtros vêm depois
+FILTROS_PRONTOS = {
+    'pb': 'P&B',
+    'sepia': 'SÉPIA',
+    'quente': 'QUENTE',
+    'frio': 'FRIO',
+    'vintage': 'VINTAGE',
+}
+
+# Níveis por canal da grade usada no preview (64: cada nível cobre 4 valores de 0 a 255)
+NIVEIS_PREVIEW = 64
+# Linhas interpoladas de cada vez na foto final (limita a memória dos intermediários)
+LINHAS_POR_BLOCO = 128
+
+
+class Filtro:
+    """Filtro de cor por tabela de consulta
+
+    'curvas': (256, 3) com a saída de cada canal (BGR) para cada valor de entrada.
+    'tabela': (N, N, N, 3) em [0, 1], indexada por [b][g][r], com a saída em BGR.
+    """
+
+    def __init__(self, nome, curvas=None, tabela=None):
+        if (curvas is None) == (tabela is None):
+            raise ValueError(f"Filtro {nome}: informe as curvas (1D) ou a tabela (3D)")
+        self.nome = nome
+        self.curvas = None
+        self.tabela = None
+        if curvas is not None:
+            curvas = np.clip(np.round(np.asarray(curvas, dtype=np.float32)), 0, 255)
+            self.curvas = np.ascontiguousarray(curvas.astype(np.uint8).reshape(256, 1, 3))
+        else:
+            self.tabela = np.ascontiguousarray(tabela, dtype=np.float32)
+            if self.tabela.ndim != 4 or self.tabela.shape[3] != 3 or self.tabela.shape[0] < 2:
+                raise ValueError(f"Filtro {nome}: tabela 3D inválida {self.tabela.shape}")
+            self._preparar_preview()
+
+    def aplicar(self, imagem_bgr, rapido=False):
+        """Aplica o filtro à imagem BGR (rapido=True: consulta aproximada do preview)"""
+        if self.curvas is not None:
+            return cv2.LUT(imagem_bgr, self.curvas)
+        if rapido:
+            return self._aplicar_vizinho(imagem_bgr)
+        return self._aplicar_trilinear(imagem_bgr)
+
+    def _preparar_preview(self):
+        """Grade de 64 níveis com a saída de cada célula já empacotada (B, G, R, 0 em um uint32)"""
+        passo = 256 // NIVEIS_PREVIEW
+        centros = np.arange(NIVEIS_PREVIEW, dtype=np.float32) * passo + (passo - 1) / 2.0
+        b, g, r = np.meshgrid(centros, centros, centros, indexing='ij')
+        cores = self._interpolar(np.stack([b, g, r], axis=-1).reshape(-1, 3))
+        empacotadas = np.zeros((cores.shape[0], 4), dtype=np.uint8)
+        empacotadas[:, :3] = np.clip(np.round(cores), 0, 255)
+        self._grade_preview = empacotadas.view(np.uint32).reshape(-1)
+
+        # Contribuição de cada canal para o índice da célula: b * 64² + g * 64 + r
+        nivel = np.arange(256, dtype=np.int32) // passo
+        self._indices = np.empty((256, 1, 3), dtype=np.int32)
+        self._indices[:, 0, 0] = nivel * NIVEIS_PREVIEW * NIVEIS_PREVIEW
+        self._indices[:, 0, 1] = nivel * NIVEIS_PREVIEW
+        self._indices[:, 0, 2] = nivel
+
+    def _aplicar_vizinho(self, imagem_bgr):
+        """Índice da célula por pixel (cv2.LUT + soma dos canais) e uma busca na grade"""
+        altura, largura = imagem_bgr.shape[:2]
+        indices = cv2.transform(cv2.LUT(imagem_bgr, self._indices), np.ones((1, 3), dtype=np.float32))
+        cores = np.take(self._grade_preview, indices.reshape(altura, largura))
+        return cv2.cvtColor(cores.view(np.uint8).reshape(altura, largura, 4), cv2.COLOR_BGRA2BGR)
+
+    def _aplicar_trilinear(self, imagem_bgr):
+        """Interpolação trilinear na tabela original, em blocos de linhas"""
+        altura, largura = imagem_bgr.shape[:2]
+        saida = np.empty_like(imagem_bgr)
+        for inicio in range(0, altura, LINHAS_POR_BLOCO):
+            bloco = imagem_bgr[inicio:inicio + LINHAS_POR_BLOCO]
+            cores = self._interpolar(bloco.reshape(-1, 3).astype(np.float32))
+            saida[inicio:inicio + LINHAS_POR_BLOCO] = np.clip(np.round(cores), 0, 255).reshape(bloco.shape)
+        return saida
+
+    def _interpolar(self, cores_bgr):
+        """Saída (0 a 255) da tabela para cores BGR (N x 3, de 0 a 255), por interpolação trilinear"""
+        n = self.tabela.shape[0]
+        posicoes = cores_bgr * np.float32((n - 1) / 255.0)
+        base = np.clip(np.floor(posicoes).astype(np.int32), 0, n - 2)
+        fracao = posicoes - base
+        tabela = self.tabela.reshape(-1, 3)
+
+        resultado = np.zeros((cores_bgr.shape[0], 3), dtype=np.float32)
+        for db in (0, 1):
+            peso_b = fracao[:, 0] if db else 1 - fracao[:, 0]
+            for dg in (0, 1):
+                peso_bg = peso_b * (fracao[:, 1] if dg else 1 - fracao[:, 1])
+                for dr in (0, 1):
+                    peso = peso_bg * (fracao[:, 2] if dr else 1 - fracao[:, 2])
+                    indice = ((base[:, 0] + db) * n + base[:, 1] + dg) * n + base[:, 2] + dr
+                    resultado += tabela[indice] * peso[:, None]
+        return resultado * 255.0
+
+
+def carregar_cube(caminho):
+    """Lê um arquivo .cube (LUT_3D_SIZE ou LUT_1D_SIZE, domínio de 0 a 1)"""
+    tamanho_3d = tamanho_1d = None
+    valores = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            partes = linha.split()
+            if not partes or partes[0].startswith('#'):
+                continue
+            chave = partes[0].upper()
+            if chave == 'LUT_3D_SIZE':
+                tamanho_3d = int(partes[1])
+            elif chave == 'LUT_1D_SIZE':
+                tamanho_1d = int(partes[1])
+            elif chave in ('DOMAIN_MIN', 'DOMAIN_MAX'):
+                padrao = 0.0 if chave == 'DOMAIN_MIN' else 1.0
+                if any(abs(float(v) - padrao) > 1e-6 for v in partes[1:4]):
+                    raise ValueError(f"Filtro {caminho}: domínio diferente de 0 a 1 não suportado")
+            elif chave[0].isalpha():
+                # TITLE e outras palavras-chave que não mudam a tabela
+                continue
+            else:
+                valores.append([float(v) for v in partes[:3]])
+
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    valores = np.asarray(valores, dtype=np.float32)
+    if tamanho_3d is not None:
+        if valores.shape != (tamanho_3d ** 3, 3):
+            raise ValueError(f"Filtro {caminho}: esperadas {tamanho_3d ** 3} cores, lidas {len(valores)}")
+        # No .cube o vermelho varia mais rápido: [b][g][r] com a saída em RGB -> BGR
+        return Filtro(nome, tabela=valores.reshape(tamanho_3d, tamanho_3d, tamanho_3d, 3)[..., ::-1])
+    if tamanho_1d is not None:
+        if valores.shape != (tamanho_1d, 3):
+            raise ValueError(f"Filtro {caminho}: esperadas {tamanho_1d} linhas, lidas {len(valores)}")
+        entrada = np.linspace(0.0, 1.0, tamanho_1d)
+        x = np.arange(256) / 255.0
+        curvas = np.stack([np.interp(x, entrada, valores[:, canal]) for canal in (2, 1, 0)], axis=-1)
+        return Filtro(nome, curvas=curvas * 255.0)
+    raise ValueError(f"Filtro {caminho}: falta LUT_3D_SIZE ou LUT_1D_SIZE")
+
+
+def listar_filtros(diretorio='filtros'):
+    """Identificadores dos filtros disponíveis: os prontos e os .cube da pasta"""
+    identificadores = list(FILTROS_PRONTOS)
+    if os.path.isdir(diretorio):
+        identificadores += sorted(
+            os.path.join(diretorio, arquivo) for arquivo in os.listdir(diretorio)
+            if arquivo.lower().endswith('.cube')
+        )
+    return identificadores
+
+
+def nome_filtro(identificador):
+    """Nome do filtro para mostrar na tela"""
+    if identificador is None:
+        return 'NENHUM'
+    return FILTROS_PRONTOS.get(identificador) or os.path.splitext(os.path.basename(identificador))[0].upper()
+
+
+_filtros = {}
+_lock = threading.Lock()
+
+
+def obter_filtro(identificador):
+    """Filtro pelo identificador (pronto ou caminho de um .cube), criado uma vez por processo"""
+    if identificador is None:
+        return None
+    with _lock:
+        filtro = _filtros.get(identificador)
+        if filtro is None:
+            if identificador in _CRIADORES:
+                filtro = _CRIADORES[identificador]()
+            else:
+                filtro = carregar_cube(identificador)
+            _filtros[identificador] = filtro
+        return filtro
+
+
+def aplicar_filtro(imagem_bgr, identificador, rapido=False):
+    """Aplica o filtro (se houver) à imagem BGR"""
+    filtro = obter_filtro(identificador)
+    return imagem_bgr if filtro is None else filtro.aplicar(imagem_bgr, rapido)
+
+
+def _tabela_de_matriz(matriz_rgb, tamanho=17):
+    """Tabela 3D de uma mistura linear dos canais (matriz 3x3 sobre RGB), com saturação em 0 e 1"""
+    niveis = np.linspace(0.0, 1.0, tamanho, dtype=np.float32)
+    b, g, r = np.meshgrid(niveis, niveis, niveis, indexing='ij')
+    rgb = np.stack([r, g, b], axis=-1) @ np.asarray(matriz_rgb, dtype=np.float32).T
+    return np.clip(rgb, 0.0, 1.0)[..., ::-1]
+
+
+def _curvas(vermelho, verde, azul):
+    """Curvas (256 x 3, em BGR) a partir de uma função por canal sobre os valores 0 a 255"""
+    x = np.arange(256, dtype=np.float32)
+    return np.stack([azul(x), verde(x), vermelho(x)], axis=-1)
+
+
+def _contraste_s(x, intensidade):
+    """Curva em S (mais contraste nos tons médios) com intensidade de 0 a 1"""
+    t = x / 255.0
+    return 255.0 * (t + intensidade * (t - 0.5) * (1 - np.abs(2 * t - 1)))
+
+
+_CRIADORES = {
+    'pb': lambda: Filtro('pb', tabela=_tabela_de_matriz([[0.299, 0.587, 0.114]] * 3)),
+    'sepia': lambda: Filtro('sepia', tabela=_tabela_de_matriz([
+        [0.393, 0.769, 0.189],
+        [0.349, 0.686, 0.168],
+        [0.272, 0.534, 0.131],
+    ])),
+    'quente': lambda: Filtro('quente', curvas=_curvas(
+        lambda x: x * 1.08 + 6, lambda x: x * 1.02 + 2, lambda x: x * 0.88,
+    )),
+    'frio': lambda: Filtro('frio', curvas=_curvas(
+        lambda x: x * 0.9, lambda x: x * 1.0 + 2, lambda x: x * 1.08 + 8,
+    )),
+    'vintage': lambda: Filtro('vintage', curvas=_curvas(
+        # Pretos lavados, altas luzes suavizadas e tom amarelado
+        lambda x: 28 + _contraste_s(x, 0.3) * 0.82,
+        lambda x: 22 + _contraste_s(x, 0.3) * 0.78,
+        lambda x: 40 + _contraste_s(x, 0.2) * 0.6,
+    )),
+}
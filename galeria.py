@@ -0,0 +1,460 @@
+"""
+Galeria de fotos da cabine na rede local
+Um servidor HTTP embutido mostra as fotos gravadas na pasta 'fotos' para os convidados
+baixarem pelo celular. Cada foto ganha versões menores (pequena e média) geradas uma
+única vez em segundo plano; os arquivos são enviados direto do disco para a conexão,
+sem carregá-los na memória, com ETag/Last-Modified para o celular reaproveitar o que
+já baixou. A listagem é paginada a partir de um índice em memória, sem varrer a pasta
+a cada acesso
+"""
+
+import hashlib
+import html
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image
+
+# Fotos que entram na galeria (os frames originais da câmera ficam de fora)
+EXTENSOES_FOTO = ('.jpg', '.jpeg', '.png', '.webp')
+TIPOS_CONTEUDO = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+}
+
+# Fotos não mudam depois de gravadas; a listagem sempre é revalidada (ETag)
+CACHE_FOTOS = 'public, max-age=86400'
+CACHE_LISTAGEM = 'no-cache'
+
+# Quanto uma requisição espera pela versão reduzida antes de receber a foto original (em segundos)
+ESPERA_VERSAO = 2
+
+
+class ServidorGaleria:
+    def __init__(self, diretorio_fotos='fotos', diretorio_versoes='cache_galeria', porta=8080,
+                 tamanhos=None, fotos_por_pagina=24, qualidade=85, metricas=None):
+        self.diretorio_fotos = diretorio_fotos
+        self.diretorio_versoes = diretorio_versoes
+        self.tamanhos = dict(tamanhos or {'pequena': (320, 320), 'media': (1080, 1080)})
+        self.fotos_por_pagina = fotos_por_pagina
+        self.qualidade = qualidade
+        # Registro opcional do tempo de geração das versões e dos acessos (metricas.Metricas)
+        self.metricas = metricas
+        os.makedirs(self.diretorio_versoes, exist_ok=True)
+
+        # Índice das fotos, da mais antiga para a mais nova, e versão dele (ETag da listagem)
+        self._fotos = []
+        self._por_id = {}
+        self._versao_indice = 0
+        self._lock = threading.Lock()
+
+        # Uma thread para as fotos já existentes (varredura inicial) e outra, que não fica atrás
+        # delas, para as fotos novas e as pedidas pelos celulares; poucas, para não competir com a câmera
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='galeria_versoes')
+        self._executor_prioritario = ThreadPoolExecutor(max_workers=1, thread_name_prefix='galeria_prioridade')
+        # id da foto -> (Future, prioritário)
+        self._pendentes = {}
+
+        self._servidor = ThreadingHTTPServer(('', porta), _ManipuladorGaleria)
+        self._servidor.daemon_threads = True
+        self._servidor.galeria = self
+        self.porta = self._servidor.server_address[1]
+        self._thread = None
+
+    def iniciar(self):
+        """Indexa as fotos já gravadas e começa a atender em segundo plano"""
+        if self._thread is not None:
+            return
+        self._executor.submit(self._indexar_existentes)
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name='galeria', daemon=True)
+        self._thread.start()
+        print(f"[INFO] Galeria disponível em {self.endereco()}")
+
+    def endereco(self):
+        """Endereço da galeria na rede local"""
+        return f"http://{_ip_local()}:{self.porta}/"
+
+    def encerrar(self):
+        """Para o servidor e a geração de versões (o que não começou é descartado)"""
+        if self._thread is not None:
+            self._servidor.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._servidor.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor_prioritario.shutdown(wait=False, cancel_futures=True)
+
+    def adicionar(self, caminho):
+        """Inclui uma foto recém-gravada no índice e agenda a geração das versões dela"""
+        foto = self._indexar(caminho)
+        if foto is not None:
+            self.gerar_versoes(foto, prioritaria=True)
+
+    def pagina(self, numero):
+        """Retorna (fotos da página, total de páginas, total de fotos), das mais novas para as mais antigas"""
+        with self._lock:
+            total = len(self._fotos)
+            paginas = max(1, -(-total // self.fotos_por_pagina))
+            numero = min(max(numero, 1), paginas)
+            fim = total - (numero - 1) * self.fotos_por_pagina
+            inicio = max(fim - self.fotos_por_pagina, 0)
+            return list(reversed(self._fotos[inicio:fim])), paginas, total
+
+    def versao_indice(self):
+        """Muda sempre que uma foto entra ou sai do índice"""
+        with self._lock:
+            return self._versao_indice
+
+    def obter(self, id_foto):
+        """Foto do índice pelo identificador, ou None"""
+        with self._lock:
+            return self._por_id.get(id_foto)
+
+    def caminho_versao(self, foto, nome):
+        """Caminho da versão reduzida da foto (chave: identificador + mtime + tamanho)"""
+        largura, altura = self.tamanhos[nome]
+        return os.path.join(self.diretorio_versoes, f"{foto['id']}_{foto['mtime']}_{largura}x{altura}.jpg")
+
+    def gerar_versoes(self, foto, prioritaria=False):
+        """Agenda a geração das versões que faltam e retorna um Future
+
+        Com prioritaria=True a foto não espera as fotos antigas: se ela ainda estiver na
+        fila da varredura inicial, sai de lá e vai para a thread prioritária.
+        """
+        antigo = None
+        with self._lock:
+            futuro, ja_prioritaria = self._pendentes.get(foto['id'], (None, False))
+            if futuro is not None and prioritaria and not ja_prioritaria and not futuro.running():
+                antigo, futuro = futuro, None
+            if futuro is not None:
+                return futuro
+            executor = self._executor_prioritario if prioritaria else self._executor
+            futuro = executor.submit(self._gerar_versoes, foto)
+            self._pendentes[foto['id']] = (futuro, prioritaria)
+        # Fora do lock: cancel() e add_done_callback() de um Future já terminado chamam o
+        # callback aqui mesmo, e ele pega o lock. Se a antiga já tiver começado, a geração
+        # prioritária encontra as versões prontas e termina logo
+        if antigo is not None:
+            antigo.cancel()
+        futuro.add_done_callback(lambda f: self._concluir(foto['id'], f))
+        return futuro
+
+    def obter_versao(self, foto, nome, timeout=ESPERA_VERSAO):
+        """Caminho da versão pedida, ou None se ela não ficar pronta dentro do timeout"""
+        destino = self.caminho_versao(foto, nome)
+        if not os.path.exists(destino):
+            try:
+                self.gerar_versoes(foto, prioritaria=True).result(timeout=timeout)
+            except TimeoutError:
+                return None
+        return destino
+
+    def remover(self, id_foto):
+        """Tira do índice uma foto cujo arquivo não existe mais"""
+        with self._lock:
+            foto = self._por_id.pop(id_foto, None)
+            if foto is not None:
+                self._fotos.remove(foto)
+                self._versao_indice += 1
+
+    def _concluir(self, id_foto, futuro):
+        with self._lock:
+            # Um Future cancelado pode já ter sido substituído pelo da thread prioritária
+            if self._pendentes.get(id_foto, (None,))[0] is futuro:
+                del self._pendentes[id_foto]
+
+    def _indexar(self, caminho):
+        """Inclui a foto no índice (mantido em ordem de gravação) e a retorna"""
+        try:
+            estado = os.stat(caminho)
+        except OSError:
+            return None
+        relativo = os.path.relpath(caminho, self.diretorio_fotos).replace(os.sep, '/')
+        foto = {
+            'id': hashlib.sha1(relativo.encode('utf-8')).hexdigest()[:16],
+            'caminho': caminho,
+            'nome': os.path.basename(caminho),
+            'mtime': estado.st_mtime_ns,
+        }
+        with self._lock:
+            if foto['id'] in self._por_id:
+                return self._por_id[foto['id']]
+            # Quase sempre a foto é a mais nova; se não for, procura a posição de trás para frente
+            posicao = len(self._fotos)
+            while posicao > 0 and self._fotos[posicao - 1]['mtime'] > foto['mtime']:
+                posicao -= 1
+            self._fotos.insert(posicao, foto)
+            self._por_id[foto['id']] = foto
+            self._versao_indice += 1
+        return foto
+
+    def _indexar_existentes(self):
+        """Varre a pasta de fotos uma única vez, na inicialização"""
+        inicio = time.monotonic()
+        caminhos = []
+        for raiz, _, arquivos in os.walk(self.diretorio_fotos):
+            for arquivo in arquivos:
+                if _e_foto(arquivo):
+                    caminhos.append(os.path.join(raiz, arquivo))
+        # Em ordem de gravação, cada foto entra no fim do índice
+        caminhos.sort(key=_mtime)
+        fotos = [foto for foto in map(self._indexar, caminhos) if foto is not None]
+        print(f"[INFO] Galeria: {len(fotos)} fotos indexadas em {time.monotonic() - inicio:.2f}s")
+
+        # As versões que faltam são geradas das mais novas para as mais antigas
+        for foto in sorted(fotos, key=lambda f: f['mtime'], reverse=True):
+            if not all(os.path.exists(self.caminho_versao(foto, nome)) for nome in self.tamanhos):
+                self.gerar_versoes(foto)
+
+    def _gerar_versoes(self, foto):
+        """Decodifica a foto uma vez e grava as versões, da maior para a menor, de forma atômica"""
+        faltantes = [nome for nome in self.tamanhos if not os.path.exists(self.caminho_versao(foto, nome))]
+        if not faltantes:
+            return
+        inicio = time.monotonic()
+        faltantes.sort(key=lambda nome: self.tamanhos[nome][0] * self.tamanhos[nome][1], reverse=True)
+        try:
+            with Image.open(foto['caminho']) as imagem:
+                # No JPEG o decodificador já reduz a imagem (DCT), bem mais rápido que decodificar tudo
+                imagem.draft('RGB', self.tamanhos[faltantes[0]])
+                atual = imagem.convert('RGB')
+        except OSError:
+            # A foto foi apagada ou movida: sai da galeria
+            print(f"[AVISO] Foto da galeria não encontrada: {foto['caminho']}")
+            self.remover(foto['id'])
+            return
+
+        for nome in faltantes:
+            atual = atual.copy()
+            atual.thumbnail(self.tamanhos[nome], Image.Resampling.LANCZOS, reducing_gap=2.0)
+            destino = self.caminho_versao(foto, nome)
+            temporario = f"{destino}.{threading.get_ident()}.tmp"
+            atual.save(temporario, 'JPEG', quality=self.qualidade)
+            os.replace(temporario, destino)
+        if self.metricas is not None:
+            self.metricas.registrar('galeria_versoes', time.monotonic() - inicio)
+
+
+class _ManipuladorGaleria(BaseHTTPRequestHandler):
+    """Atende as páginas da galeria, a listagem em JSON e os arquivos das fotos"""
+
+    # HTTP/1.1 mantém a conexão aberta entre as miniaturas de uma mesma página
+    protocol_version = 'HTTP/1.1'
+    server_version = 'CabineGaleria/1.0'
+    # Conexões paradas de celulares que saíram da rede são fechadas
+    timeout = 30
+
+    def do_GET(self):
+        try:
+            self._atender()
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            # O convidado fechou a página no meio do envio
+            self.close_connection = True
+
+    do_HEAD = do_GET
+
+    def log_message(self, formato, *args):
+        # Sem uma linha no console por miniatura; os acessos vão para as métricas
+        pass
+
+    def _atender(self):
+        galeria = self.server.galeria
+        if galeria.metricas is not None:
+            galeria.metricas.incrementar('galeria_requisicoes')
+
+        url = urlsplit(self.path)
+        partes = [parte for parte in url.path.split('/') if parte]
+        parametros = parse_qs(url.query)
+        try:
+            numero = int(parametros.get('pagina', ['1'])[0])
+        except ValueError:
+            numero = 1
+
+        if not partes:
+            self._enviar_listagem(galeria, numero, 'html')
+        elif partes == ['api', 'fotos']:
+            self._enviar_listagem(galeria, numero, 'json')
+        elif len(partes) == 3 and partes[0] == 'fotos':
+            self._enviar_foto(galeria, partes[1], partes[2])
+        else:
+            self._enviar_erro(404, "Página não encontrada")
+
+    def _enviar_listagem(self, galeria, numero, formato):
+        """Página da galeria (HTML ou JSON), revalidada pela versão do índice"""
+        etag = f'"indice-{galeria.versao_indice()}-{numero}-{formato}"'
+        if self._nao_modificado(etag, None):
+            self._enviar_nao_modificado(etag, None, CACHE_LISTAGEM)
+            return
+
+        fotos, paginas, total = galeria.pagina(numero)
+        numero = min(max(numero, 1), paginas)
+        if formato == 'json':
+            corpo = json.dumps({
+                'pagina': numero,
+                'paginas': paginas,
+                'total': total,
+                'fotos': [_descrever(foto, galeria.tamanhos) for foto in fotos],
+            }).encode('utf-8')
+            tipo = 'application/json'
+        else:
+            corpo = _pagina_html(fotos, numero, paginas, total).encode('utf-8')
+            tipo = 'text/html; charset=utf-8'
+
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', CACHE_LISTAGEM)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    def _enviar_foto(self, galeria, id_foto, versao):
+        """Foto original ou uma das versões reduzidas"""
+        foto = galeria.obter(id_foto)
+        if foto is None or (versao != 'original' and versao not in galeria.tamanhos):
+            self._enviar_erro(404, "Foto não encontrada")
+            return
+
+        caminho = None
+        cache = CACHE_FOTOS
+        if versao != 'original':
+            try:
+                caminho = galeria.obter_versao(foto, versao)
+            except Exception as e:
+                print(f"[ERRO] Falha ao gerar a versão {versao} de {foto['nome']}: {type(e).__name__}: {e}")
+            if caminho is None:
+                # Versão ainda não pronta: a original serve por enquanto, sem ficar guardada no celular
+                if galeria.metricas is not None:
+                    galeria.metricas.incrementar('galeria_versao_original')
+                cache = 'no-store'
+        if caminho is None:
+            caminho = foto['caminho']
+
+        try:
+            arquivo = open(caminho, 'rb')
+        except OSError:
+            galeria.remover(id_foto)
+            self._enviar_erro(404, "Foto não encontrada")
+            return
+
+        with arquivo:
+            estado = os.fstat(arquivo.fileno())
+            etag = f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+            if self._nao_modificado(etag, estado.st_mtime):
+                self._enviar_nao_modificado(etag, estado.st_mtime, cache)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', TIPOS_CONTEUDO.get(os.path.splitext(caminho)[1].lower(),
+                                                               'application/octet-stream'))
+            self.send_header('Content-Length', str(estado.st_size))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(estado.st_mtime, usegmt=True))
+            self.send_header('Cache-Control', cache)
+            if versao == 'original':
+                self.send_header('Content-Disposition', f'inline; filename="{foto["nome"]}"')
+            self.end_headers()
+            if self.command != 'HEAD':
+                # Do disco direto para a conexão (sendfile quando o sistema suporta)
+                self.connection.sendfile(arquivo)
+
+    def _nao_modificado(self, etag, modificado):
+        """Indica se o celular já tem a versão atual (If-None-Match ou If-Modified-Since)"""
+        pedido = self.headers.get('If-None-Match')
+        if pedido is not None:
+            return pedido.strip() == '*' or etag in [valor.strip() for valor in pedido.split(',')]
+        desde = self.headers.get('If-Modified-Since')
+        if desde and modificado is not None:
+            try:
+                return int(modificado) <= parsedate_to_datetime(desde).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _enviar_nao_modificado(self, etag, modificado, cache):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        if modificado is not None:
+            self.send_header('Last-Modified', formatdate(modificado, usegmt=True))
+        self.send_header('Cache-Control', cache)
+        self.end_headers()
+
+    def _enviar_erro(self, codigo, mensagem):
+        corpo = mensagem.encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+
+def _e_foto(nome):
+    """Fotos compostas gravadas pela cabine (sem temporários nem frames originais)"""
+    base, extensao = os.path.splitext(nome.lower())
+    return extensao in EXTENSOES_FOTO and '_original' not in base
+
+
+def _mtime(caminho):
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _descrever(foto, tamanhos):
+    """Dados públicos de uma foto na listagem em JSON"""
+    urls = {nome: f"/fotos/{foto['id']}/{nome}" for nome in tamanhos}
+    urls['original'] = f"/fotos/{foto['id']}/original"
+    return {'id': foto['id'], 'nome': foto['nome'], 'gravada_em': foto['mtime'] // 1_000_000_000, 'urls': urls}
+
+
+def _pagina_html(fotos, numero, paginas, total):
+    """Página simples para celular: grade de miniaturas e navegação entre páginas"""
+    itens = "\n".join(
+        f'<div><a href="/fotos/{foto["id"]}/media"><img src="/fotos/{foto["id"]}/pequena" loading="lazy" '
+        f'alt="{html.escape(foto["nome"])}"></a>'
+        f'<a class="baixar" href="/fotos/{foto["id"]}/original" download="{html.escape(foto["nome"])}">baixar</a></div>'
+        for foto in fotos
+    )
+    navegacao = []
+    if numero > 1:
+        navegacao.append(f'<a href="/?pagina={numero - 1}">&larr; mais novas</a>')
+    navegacao.append(f'página {numero} de {paginas}')
+    if numero < paginas:
+        navegacao.append(f'<a href="/?pagina={numero + 1}">mais antigas &rarr;</a>')
+    return (
+        '<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        '<title>Cabine Fotográfica</title><style>'
+        'body{font-family:sans-serif;background:#111;color:#eee;margin:0;padding:12px;text-align:center}'
+        '.grade{display:grid;grid-template-columns:repeat(auto-fill,minmax(150px,1fr));gap:8px}'
+        '.grade img{width:100%;display:block;border-radius:4px}'
+        'a{color:#8cf}.baixar{font-size:14px}nav{margin:16px;display:flex;gap:16px;'
+        'justify-content:center}</style></head><body>'
+        f'<h1>Cabine Fotográfica</h1><p>{total} fotos</p>'
+        f'<div class="grade">{itens}</div><nav>{"".join(navegacao)}</nav></body></html>'
+    )
+
+
+def _ip_local():
+    """IP da máquina na rede local (sem enviar nada: só escolhe a interface de saída)"""
+    conexao = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        conexao.connect(('10.255.255.255', 1))
+        return conexao.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+    finally:
+        conexao.close()
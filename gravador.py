@@ -0,0 +1,111 @@
+"""
+Gravação das fotos da cabine fotográfica em segundo plano
+As fotos entram em uma fila limitada e uma thread as codifica com o OpenCV e grava
+de forma atômica em uma pasta por evento e por sessão, com nomes que nunca colidem.
+Opcionalmente guarda também o frame original da câmera ao lado da foto composta
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+# Extensão e parâmetros do cv2.imencode para cada formato suportado
+FORMATOS = {
+    'jpg': ('.jpg', lambda qualidade: [cv2.IMWRITE_JPEG_QUALITY, qualidade]),
+    'png': ('.png', lambda qualidade: [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+    'webp': ('.webp', lambda qualidade: [cv2.IMWRITE_WEBP_QUALITY, qualidade]),
+}
+
+
+class GravadorFotos:
+    def __init__(self, diretorio='fotos', evento=None, formato='jpg', qualidade=95,
+                 salvar_original=False, tamanho_fila=8, ao_salvar=None, metricas=None):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de foto inválido: {formato}")
+        self.formato = formato
+        self.qualidade = qualidade
+        self.salvar_original = salvar_original
+        # Chamado (na thread de gravação) com o caminho de cada foto gravada, ex.: a galeria
+        self.ao_salvar = ao_salvar
+        # Registro opcional do tempo de gravação e das fotos perdidas (metricas.Metricas)
+        self.metricas = metricas
+
+        # fotos/<evento>/<sessão>: o evento padrão é o dia, a sessão é cada execução do programa
+        agora = datetime.now()
+        self.diretorio = os.path.join(
+            diretorio, evento or agora.strftime("%Y-%m-%d"), agora.strftime("sessao_%H%M%S")
+        )
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        self._sequencia = 0
+        self._lock = threading.Lock()
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = threading.Thread(target=self._executar, name='gravador', daemon=True)
+        self._thread.start()
+
+    def salvar(self, imagem_bgr, originais=()):
+        """Agenda a gravação da foto (e dos frames originais) e retorna o caminho dela
+
+        Não bloqueia: se a fila estiver cheia a foto não é gravada e retorna None.
+        """
+        with self._lock:
+            self._sequencia += 1
+            nome = f"foto_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{self._sequencia:04d}"
+        extensao = FORMATOS[self.formato][0]
+        arquivos = [(os.path.join(self.diretorio, nome + extensao), imagem_bgr)]
+        if self.salvar_original:
+            for i, original in enumerate(originais, 1):
+                arquivos.append((os.path.join(self.diretorio, f"{nome}_original{i}{extensao}"), original))
+
+        try:
+            self._fila.put_nowait(arquivos)
+        except queue.Full:
+            print(f"[AVISO] Fila de gravação cheia, a foto {nome} não será salva")
+            if self.metricas is not None:
+                self.metricas.incrementar('fotos_nao_salvas')
+            return None
+        return arquivos[0][0]
+
+    def encerrar(self, timeout=10):
+        """Grava o que ainda estiver na fila e para a thread"""
+        self._fila.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _executar(self):
+        """Laço da thread: codifica e grava as fotos da fila"""
+        while True:
+            arquivos = self._fila.get()
+            if arquivos is None:
+                return
+            inicio = time.monotonic()
+            try:
+                for destino, imagem in arquivos:
+                    self._gravar(destino, imagem)
+                print(f"[INFO] Foto salva em: {arquivos[0][0]}")
+            except Exception as e:
+                print(f"[ERRO] Falha ao salvar a foto: {e}")
+                if self.metricas is not None:
+                    self.metricas.incrementar('fotos_nao_salvas')
+                continue
+            if self.metricas is not None:
+                self.metricas.registrar('gravacao_foto', time.monotonic() - inicio)
+            if self.ao_salvar is not None:
+                try:
+                    self.ao_salvar(arquivos[0][0])
+                except Exception as e:
+                    print(f"[ERRO] Falha ao avisar a gravação da foto: {e}")
+
+    def _gravar(self, destino, imagem_bgr):
+        """Codifica a imagem e grava de forma atômica (arquivo temporário + renomear)"""
+        extensao, parametros = FORMATOS[self.formato]
+        ok, dados = cv2.imencode(extensao, imagem_bgr, parametros(self.qualidade))
+        if not ok:
+            raise IOError(f"Falha ao codificar a imagem {destino}")
+        temporario = destino + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(dados.tobytes())
+        os.replace(temporario, destino)
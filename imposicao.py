@@ -0,0 +1,150 @@
+"""
+Imposição das fotos na folha de impressão
+Em vez de uma foto por folha, a folha pode levar 2 ou 4 cópias da mesma foto ou as
+fotos de vários convidados, em uma grade com marcas de corte. A fila de impressão
+junta os trabalhos pendentes com a mesma montagem quando a impressora está ocupada,
+o que diminui o número de folhas (e o tempo de impressora) por convidado.
+A folha é gerada em faixas horizontais, reamostradas uma a uma, para a memória da
+impressão não depender da resolução da impressora
+"""
+
+import cv2
+import numpy as np
+
+from composicao import celulas_grade
+
+# Montagens disponíveis: grade da folha e quantas células cada foto ocupa (cópias).
+# Uma folha leva (colunas x linhas) / cópias convidados. Com folha A4, metade e quarto
+# de folha mantêm a proporção da foto (girada em 90° no caso da metade)
+LAYOUTS = {
+    '1-up': {'colunas': 1, 'linhas': 1, 'copias': 1, 'margem': 0, 'marcas_corte': False},
+    '2-up': {'colunas': 1, 'linhas': 2, 'copias': 2},
+    '4-up': {'colunas': 2, 'linhas': 2, 'copias': 4},
+    '2-convidados': {'colunas': 1, 'linhas': 2, 'copias': 1},
+    '4-convidados': {'colunas': 2, 'linhas': 2, 'copias': 1},
+    '4-up-2-convidados': {'colunas': 2, 'linhas': 2, 'copias': 2},
+}
+LAYOUT_PADRAO = '1-up'
+
+# Margem entre as células (5 mm em 300 DPI), onde ficam as marcas de corte
+MARGEM_PADRAO = 60
+
+# Linhas da folha geradas (e enviadas à impressora) de cada vez
+ALTURA_FAIXA = 256
+
+
+def obter_layout(nome):
+    """Montagem pelo nome; nomes desconhecidos usam a montagem de uma foto por folha"""
+    layout = LAYOUTS.get(nome)
+    if layout is None:
+        print(f"[AVISO] Montagem de impressão desconhecida {nome!r}, usando {LAYOUT_PADRAO}")
+        layout = LAYOUTS[LAYOUT_PADRAO]
+    return layout
+
+
+def fotos_por_folha(layout):
+    """Quantos convidados diferentes cabem em uma folha"""
+    return max(1, layout['colunas'] * layout['linhas'] // layout.get('copias', 1))
+
+
+def faixas_folha(fotos, layout, tamanho, altura_faixa=ALTURA_FAIXA):
+    """Gera a folha de impressão (BGR) em faixas horizontais: (y, faixa)
+
+    Cada foto ocupa 'copias' células seguidas e células que sobram ficam em branco. As
+    fotos maiores que a célula são reduzidas uma vez; as menores (impressora com
+    resolução maior que a das fotos) são ampliadas faixa a faixa, então a folha inteira
+    nunca existe na memória. A faixa é reaproveitada: use-a antes de pedir a próxima.
+    """
+    largura_folha, altura_folha = tamanho
+    copias = layout.get('copias', 1)
+    margem = layout.get('margem', MARGEM_PADRAO)
+    celulas = celulas_grade(tamanho, layout['colunas'] * layout['linhas'], layout['colunas'], margem)
+
+    # Posição de cada cópia na folha e a foto já girada (e reduzida) para ela
+    colocacoes = []
+    for indice, foto in enumerate(fotos):
+        celulas_foto = celulas[indice * copias:(indice + 1) * copias]
+        if not celulas_foto:
+            break
+        fonte, (largura, altura) = _preparar(foto, celulas_foto[0])
+        for x, y, largura_celula, altura_celula in celulas_foto:
+            px = x + (largura_celula - largura) // 2
+            py = y + (altura_celula - altura) // 2
+            colocacoes.append((fonte, (px, py, largura, altura)))
+    retangulos = [retangulo for _, retangulo in colocacoes]
+    marcas_corte = layout.get('marcas_corte', True) and margem > 0
+
+    buffer = np.empty((min(altura_faixa, altura_folha), largura_folha, 3), dtype=np.uint8)
+    for y0 in range(0, altura_folha, altura_faixa):
+        y1 = min(y0 + altura_faixa, altura_folha)
+        faixa = buffer[:y1 - y0]
+        faixa.fill(255)
+        for fonte, retangulo in colocacoes:
+            _amostrar_faixa(fonte, retangulo, y0, y1, faixa)
+        if marcas_corte:
+            desenhar_marcas_corte(faixa, retangulos, margem, y0)
+        yield y0, faixa
+
+
+def desenhar_marcas_corte(folha, retangulos, margem, deslocamento_y=0):
+    """Desenha as marcas de corte nos cantos de cada foto, só na margem em volta dela
+
+    'deslocamento_y' é a linha da folha onde começa 'folha' (quando ela é só uma faixa).
+    """
+    afastamento = max(2, margem // 10)
+    comprimento = max(afastamento + 1, margem // 2 - 1)
+    espessura = max(1, margem // 30)
+    for x0, y0, largura, altura in retangulos:
+        y0 -= deslocamento_y
+        x1, y1 = x0 + largura, y0 + altura
+        for x, direcao_x in ((x0, -1), (x1, 1)):
+            for y, direcao_y in ((y0, -1), (y1, 1)):
+                # Traço horizontal na linha de corte y e traço vertical na linha de corte x
+                cv2.line(folha, (x + direcao_x * afastamento, y), (x + direcao_x * comprimento, y),
+                         (0, 0, 0), espessura)
+                cv2.line(folha, (x, y + direcao_y * afastamento), (x, y + direcao_y * comprimento),
+                         (0, 0, 0), espessura)
+
+
+def _preparar(foto, celula):
+    """Gira a foto se a orientação for diferente da célula e a reduz se for maior
+
+    Retorna a foto e o tamanho (largura, altura) que ela ocupa centralizada na célula.
+    """
+    _, _, largura, altura = celula
+    altura_foto, largura_foto = foto.shape[:2]
+    girar = (largura_foto > altura_foto) != (largura > altura)
+    if girar:
+        largura_foto, altura_foto = altura_foto, largura_foto
+
+    ratio = min(largura / largura_foto, altura / altura_foto)
+    tamanho = (max(1, int(round(largura_foto * ratio))), max(1, int(round(altura_foto * ratio))))
+    # Reduz antes de girar, para a rotação copiar só a foto já pequena
+    if ratio < 1:
+        foto = cv2.resize(foto, tamanho[::-1] if girar else tamanho, interpolation=cv2.INTER_AREA)
+    if girar:
+        foto = cv2.rotate(foto, cv2.ROTATE_90_CLOCKWISE)
+    return foto, tamanho
+
+
+def _amostrar_faixa(fonte, retangulo, y0, y1, faixa):
+    """Copia para a faixa (linhas y0 a y1 da folha) a parte da foto que cai nela"""
+    px, py, largura, altura = retangulo
+    inicio, fim = max(y0, py), min(y1, py + altura)
+    if inicio >= fim:
+        return
+    destino = faixa[inicio - y0:fim - y0, px:px + largura]
+    altura_fonte, largura_fonte = fonte.shape[:2]
+    if (largura_fonte, altura_fonte) == (largura, altura):
+        destino[:] = fonte[inicio - py:fim - py]
+        return
+
+    # Ampliação: calcula só as linhas desta faixa (mapeamento do destino para a foto)
+    escala_x = largura_fonte / largura
+    escala_y = altura_fonte / altura
+    matriz = np.array([
+        [escala_x, 0, 0.5 * escala_x - 0.5],
+        [0, escala_y, (inicio - py + 0.5) * escala_y - 0.5],
+    ])
+    destino[:] = cv2.warpAffine(fonte, matriz, (largura, fim - inicio),
+                                flags=cv2.INTER_CUBIC | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,440 @@
+"""
+Fila de impressão da cabine fotográfica
+Os trabalhos de impressão são gravados em disco e enviados por uma thread em segundo
+plano, com novas tentativas (espera exponencial) em caso de falha. A impressora é
+um backend intercambiável: a impressora padrão do Windows ou uma impressora
+virtual que grava as páginas em uma pasta (útil para testes). Cada trabalho tem uma
+montagem (imposicao.LAYOUTS); trabalhos pendentes com a mesma montagem de vários
+convidados saem juntos na mesma folha. A folha é enviada à impressora em faixas
+horizontais (iniciar_documento / enviar_faixa / finalizar_documento), sem nunca
+existir inteira na memória
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+
+import cv2
+import numpy as np
+
+from imposicao import ALTURA_FAIXA, LAYOUT_PADRAO, faixas_folha, fotos_por_folha, obter_layout
+
+# Biblioteca para impressão no Windows (com tratamento para ambientes não-Windows)
+try:
+    import win32print
+    import win32ui
+    from PIL import Image, ImageWin
+    WINDOWS_AVAILABLE = True
+except ImportError:
+    WINDOWS_AVAILABLE = False
+
+# Estados possíveis de um trabalho de impressão
+PENDENTE = 'pendente'
+IMPRIMINDO = 'imprimindo'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+
+
+class ImpressoraWindows:
+    """Imprime na impressora padrão do Windows, uma faixa da página de cada vez"""
+
+    def __init__(self, tamanho):
+        if not WINDOWS_AVAILABLE:
+            raise RuntimeError("Bibliotecas do Windows não disponíveis")
+        self.tamanho = tuple(tamanho)
+        self._hdc = None
+
+    def iniciar_documento(self, id_trabalho):
+        """Abre o documento de uma página na impressora padrão"""
+        impressora_padrao = win32print.GetDefaultPrinter()
+        print(f"[INFO] Imprimindo na impressora padrão: {impressora_padrao}")
+
+        # Configura o DC da impressora
+        self._hdc = win32ui.CreateDC()
+        try:
+            self._hdc.CreatePrinterDC(impressora_padrao)
+            self._hdc.StartDoc(f"Cabine Fotográfica {id_trabalho}")
+            self._hdc.StartPage()
+        except Exception:
+            self._hdc.DeleteDC()
+            self._hdc = None
+            raise
+
+    def enviar_faixa(self, faixa_bgr, y):
+        """Desenha a faixa na página a partir da linha y (o DIB tem só o tamanho da faixa)"""
+        faixa = Image.fromarray(cv2.cvtColor(faixa_bgr, cv2.COLOR_BGR2RGB))
+        dib = ImageWin.Dib(faixa)
+        dib.draw(self._hdc.GetHandleOutput(), (0, y, faixa.width, y + faixa.height))
+
+    def finalizar_documento(self, concluido=True):
+        """Fecha a página e o documento (ou cancela o documento se a impressão falhou)"""
+        try:
+            if concluido:
+                self._hdc.EndPage()
+                self._hdc.EndDoc()
+            else:
+                self._hdc.AbortDoc()
+        finally:
+            self._hdc.DeleteDC()
+            self._hdc = None
+
+
+class ImpressoraVirtual:
+    """Impressora de teste: grava cada página impressa como PNG em uma pasta, faixa a faixa"""
+
+    def __init__(self, tamanho, diretorio='impressoes'):
+        self.tamanho = tuple(tamanho)
+        self.diretorio = diretorio
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._documento = None
+
+    def iniciar_documento(self, id_trabalho):
+        """Abre o PNG da página (gravado em um temporário e renomeado no fim)"""
+        destino = os.path.join(self.diretorio, f"impressao_{id_trabalho}.png")
+        self._documento = (destino, _PNGEmFaixas(destino + '.tmp', self.tamanho))
+
+    def enviar_faixa(self, faixa_bgr, y):
+        """Acrescenta as linhas da faixa ao PNG (as faixas chegam em ordem)"""
+        self._documento[1].escrever(faixa_bgr, y)
+
+    def finalizar_documento(self, concluido=True):
+        """Conclui o PNG da página (ou o descarta se a impressão falhou)"""
+        destino, png = self._documento
+        self._documento = None
+        png.fechar()
+        if not concluido:
+            os.remove(png.caminho)
+            return
+        if png.linhas != self.tamanho[1]:
+            os.remove(png.caminho)
+            raise IOError(f"Página incompleta: {png.linhas} de {self.tamanho[1]} linhas")
+        os.replace(png.caminho, destino)
+        print(f"[INFO] Página gravada pela impressora virtual em {destino}")
+
+
+def imprimir_em_faixas(impressora, id_trabalho, faixas):
+    """Envia as faixas (y, faixa BGR) à impressora como um único documento"""
+    impressora.iniciar_documento(id_trabalho)
+    try:
+        for y, faixa in faixas:
+            impressora.enviar_faixa(faixa, y)
+    except BaseException:
+        impressora.finalizar_documento(concluido=False)
+        raise
+    impressora.finalizar_documento()
+
+
+class FilaImpressao:
+    def __init__(self, impressora, diretorio='fila_impressao', tentativas=5,
+                 espera_inicial=2.0, espera_maxima=60.0, imposicao=LAYOUT_PADRAO,
+                 altura_faixa=ALTURA_FAIXA, ao_mudar_status=None, metricas=None):
+        self.impressora = impressora
+        self.diretorio = diretorio
+        # Montagem da folha usada quando o trabalho não pede outra (a do evento)
+        self.imposicao = imposicao
+        # Linhas da folha montadas e enviadas à impressora de cada vez
+        self.altura_faixa = altura_faixa
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        # Chamado na thread da fila sempre que um trabalho muda de estado
+        self.ao_mudar_status = ao_mudar_status
+        # Registro opcional da duração das impressões e das falhas (metricas.Metricas)
+        self.metricas = metricas
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        self._trabalhos = {}
+        self._novos = deque()
+        self._condicao = threading.Condition()
+        self._ativa = True
+
+        # Retoma os trabalhos que ficaram na fila (ex.: queda de energia no meio do evento)
+        self._carregar_trabalhos()
+
+        self._thread = threading.Thread(target=self._executar, name='impressao', daemon=True)
+        self._thread.start()
+
+    def adicionar(self, imagem_bgr, imposicao=None):
+        """Coloca uma foto na fila e retorna o id do trabalho (não bloqueia)"""
+        id_trabalho = _novo_id()
+        trabalho = {
+            'id': id_trabalho,
+            'imposicao': imposicao or self.imposicao,
+            'status': PENDENTE,
+            'tentativas': 0,
+            'criado_em': time.time(),
+            'proxima_tentativa': 0,
+            'erro': None,
+            'arquivo': f"{id_trabalho}.png",
+        }
+        with self._condicao:
+            self._trabalhos[id_trabalho] = trabalho
+            # A gravação em disco é feita pela thread da fila, fora da interface
+            self._novos.append((trabalho, imagem_bgr))
+            self._condicao.notify()
+        self._notificar(trabalho)
+        return id_trabalho
+
+    def status(self, id_trabalho):
+        """Retorna uma cópia do estado do trabalho (ou None se desconhecido)"""
+        with self._condicao:
+            trabalho = self._trabalhos.get(id_trabalho)
+            return dict(trabalho) if trabalho is not None else None
+
+    def pendentes(self):
+        """Quantidade de trabalhos ainda não concluídos"""
+        with self._condicao:
+            return sum(1 for t in self._trabalhos.values() if t['status'] in (PENDENTE, IMPRIMINDO))
+
+    def encerrar(self):
+        """Para a thread da fila; trabalhos pendentes continuam gravados em disco"""
+        with self._condicao:
+            self._ativa = False
+            self._condicao.notify()
+        self._thread.join(timeout=5)
+
+    def _carregar_trabalhos(self):
+        """Lê os trabalhos gravados em disco"""
+        for arquivo in sorted(os.listdir(self.diretorio)):
+            if not arquivo.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, arquivo), 'r', encoding='utf-8') as f:
+                    trabalho = json.load(f)
+            except Exception as e:
+                print(f"[ERRO] Trabalho de impressão ilegível {arquivo}: {e}")
+                continue
+            if trabalho['status'] == IMPRIMINDO:
+                # Interrompido no meio da impressão: tenta de novo
+                trabalho['status'] = PENDENTE
+            self._trabalhos[trabalho['id']] = trabalho
+
+        pendentes = self.pendentes()
+        if pendentes:
+            print(f"[INFO] {pendentes} trabalho(s) de impressão retomado(s) da fila")
+
+    def _executar(self):
+        """Laço da thread: grava os trabalhos novos e envia os pendentes para a impressora"""
+        while True:
+            with self._condicao:
+                while self._ativa and not self._novos and self._proximo_trabalho() is None:
+                    self._condicao.wait(timeout=self._tempo_ate_proxima_tentativa())
+                if not self._ativa:
+                    return
+                # Trabalhos novos são gravados em disco antes de qualquer impressão
+                novo = self._novos.popleft() if self._novos else None
+                lote = self._proximo_lote() if novo is None else None
+
+            if novo is not None:
+                self._gravar_novo(*novo)
+            elif lote:
+                self._imprimir(lote)
+
+    def _gravar_novo(self, trabalho, imagem_bgr):
+        """Grava a imagem e os dados do trabalho em disco"""
+        try:
+            _gravar_imagem(os.path.join(self.diretorio, trabalho['arquivo']), imagem_bgr)
+            self._salvar_trabalho(trabalho)
+        except Exception as e:
+            print(f"[ERRO] Falha ao gravar trabalho de impressão: {e}")
+            self._atualizar(trabalho, status=FALHOU, erro=str(e))
+
+    def _proximo_trabalho(self):
+        """Trabalho pendente mais antigo que já pode ser tentado (chamado com o lock)"""
+        agora = time.time()
+        prontos = [
+            t for t in self._trabalhos.values()
+            if t['status'] == PENDENTE and t['proxima_tentativa'] <= agora
+        ]
+        return min(prontos, key=lambda t: t['criado_em']) if prontos else None
+
+    def _proximo_lote(self):
+        """Trabalhos que saem na próxima folha (chamado com o lock)
+
+        O mais antigo define a montagem; se ela tiver lugar para mais convidados, a folha
+        é completada com os outros trabalhos prontos com a mesma montagem. Quando a
+        impressora está em dia só há um trabalho e nada é atrasado para esperar outros.
+        """
+        trabalho = self._proximo_trabalho()
+        if trabalho is None:
+            return None
+        imposicao = trabalho.get('imposicao', self.imposicao)
+        vagas = fotos_por_folha(obter_layout(imposicao))
+        if vagas == 1:
+            return [trabalho]
+
+        agora = time.time()
+        outros = sorted(
+            (t for t in self._trabalhos.values()
+             if t is not trabalho and t['status'] == PENDENTE and t['proxima_tentativa'] <= agora
+             and t.get('imposicao', self.imposicao) == imposicao),
+            key=lambda t: t['criado_em'],
+        )
+        return [trabalho] + outros[:vagas - 1]
+
+    def _tempo_ate_proxima_tentativa(self):
+        """Quanto esperar até algum trabalho em espera poder ser tentado (chamado com o lock)"""
+        esperas = [
+            t['proxima_tentativa'] - time.time()
+            for t in self._trabalhos.values() if t['status'] == PENDENTE
+        ]
+        return max(0.1, min(esperas)) if esperas else None
+
+    def _imprimir(self, lote):
+        """Monta a folha com os trabalhos do lote e a envia para a impressora (com novas tentativas)"""
+        for trabalho in lote:
+            self._atualizar(trabalho, status=IMPRIMINDO, tentativas=trabalho['tentativas'] + 1)
+        inicio = time.monotonic()
+
+        # Um trabalho sem imagem falha sozinho, sem segurar os outros da folha
+        imagens = []
+        for trabalho in list(lote):
+            imagem = cv2.imread(os.path.join(self.diretorio, trabalho['arquivo']))
+            if imagem is None:
+                self._registrar_metricas(None, 'falhas_impressao')
+                self._falhar(trabalho, IOError(f"Imagem do trabalho {trabalho['id']} não encontrada"))
+                lote.remove(trabalho)
+            else:
+                imagens.append(imagem)
+        if not lote:
+            return
+
+        try:
+            layout = obter_layout(lote[0].get('imposicao', self.imposicao))
+            faixas = faixas_folha(imagens, layout, self.impressora.tamanho, self.altura_faixa)
+            imprimir_em_faixas(self.impressora, lote[0]['id'], faixas)
+        except Exception as e:
+            self._registrar_metricas(inicio, 'falhas_impressao')
+            for trabalho in lote:
+                self._falhar(trabalho, e)
+            return
+
+        if len(lote) == 1:
+            print("[INFO] Foto enviada para impressão com sucesso!")
+        else:
+            print(f"[INFO] Folha com {len(lote)} fotos enviada para impressão com sucesso!")
+        self._registrar_metricas(inicio, 'folhas_impressas')
+        self._registrar_metricas(None, 'impressoes_concluidas', len(lote))
+        for trabalho in lote:
+            self._atualizar(trabalho, status=CONCLUIDO, erro=None)
+            self._remover_arquivos(trabalho)
+        self._esquecer_concluidos()
+
+    def _falhar(self, trabalho, erro):
+        """Agenda nova tentativa do trabalho (espera exponencial) ou desiste dele"""
+        if trabalho['tentativas'] >= self.tentativas:
+            print(f"[ERRO] Impressão {trabalho['id']} falhou após {trabalho['tentativas']} tentativas: {erro}")
+            self._atualizar(trabalho, status=FALHOU, erro=str(erro))
+            self._registrar_metricas(None, 'impressoes_abandonadas')
+        else:
+            espera = min(self.espera_inicial * 2 ** (trabalho['tentativas'] - 1), self.espera_maxima)
+            print(f"[AVISO] Falha ao imprimir {trabalho['id']} ({erro}); nova tentativa em {espera:.1f}s")
+            self._atualizar(trabalho, status=PENDENTE, erro=str(erro),
+                            proxima_tentativa=time.time() + espera)
+
+    def _esquecer_concluidos(self, manter=50):
+        """Mantém em memória apenas os trabalhos concluídos mais recentes"""
+        with self._condicao:
+            concluidos = sorted(
+                (t for t in self._trabalhos.values() if t['status'] == CONCLUIDO),
+                key=lambda t: t['criado_em'],
+            )
+            for trabalho in concluidos[:-manter]:
+                del self._trabalhos[trabalho['id']]
+
+    def _atualizar(self, trabalho, **campos):
+        """Altera o estado do trabalho, grava em disco e notifica a interface"""
+        with self._condicao:
+            trabalho.update(campos)
+        if trabalho['status'] != CONCLUIDO:
+            self._salvar_trabalho(trabalho)
+        self._notificar(trabalho)
+
+    def _registrar_metricas(self, inicio, contador, quantidade=1):
+        """Registra a duração da tentativa de impressão (se houver) e incrementa o contador"""
+        if self.metricas is None:
+            return
+        if inicio is not None:
+            self.metricas.registrar('impressao', time.monotonic() - inicio)
+        self.metricas.incrementar(contador, quantidade)
+
+    def _notificar(self, trabalho):
+        if self.ao_mudar_status is not None:
+            self.ao_mudar_status(dict(trabalho))
+
+    def _salvar_trabalho(self, trabalho):
+        """Grava os dados do trabalho em JSON de forma atômica"""
+        destino = os.path.join(self.diretorio, f"{trabalho['id']}.json")
+        temporario = destino + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(trabalho, f)
+        os.replace(temporario, destino)
+
+    def _remover_arquivos(self, trabalho):
+        """Apaga os arquivos de um trabalho concluído"""
+        for nome in (trabalho['arquivo'], f"{trabalho['id']}.json"):
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except FileNotFoundError:
+                pass
+
+
+def _novo_id():
+    """Gera um id de trabalho ordenável pela data e sem colisões"""
+    return time.strftime("%Y%m%d_%H%M%S") + '_' + uuid.uuid4().hex[:8]
+
+
+def _gravar_imagem(destino, imagem_bgr):
+    """Grava a imagem em PNG de forma atômica (arquivo temporário + renomear)"""
+    ok, dados = cv2.imencode('.png', imagem_bgr, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise IOError(f"Falha ao codificar a imagem {destino}")
+    temporario = destino + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(dados.tobytes())
+    os.replace(temporario, destino)
+
+
+class _PNGEmFaixas:
+    """PNG RGB gravado aos poucos: cada faixa é filtrada, comprimida e escrita ao chegar"""
+
+    def __init__(self, caminho, tamanho, nivel=1):
+        self.caminho = caminho
+        self.largura, self.altura = tamanho
+        self.linhas = 0
+        self._compressor = zlib.compressobj(nivel)
+        self._arquivo = open(caminho, 'wb')
+        self._arquivo.write(b'\x89PNG\r\n\x1a\n')
+        self._bloco(b'IHDR', struct.pack('>IIBBBBB', self.largura, self.altura, 8, 2, 0, 0, 0))
+
+    def escrever(self, faixa_bgr, y):
+        if y != self.linhas or faixa_bgr.shape[1] != self.largura:
+            raise IOError(f"Faixa fora de ordem ou de tamanho errado na linha {y}")
+        # Cada linha leva o filtro 'Sub' do PNG (diferença para o pixel à esquerda)
+        altura = faixa_bgr.shape[0]
+        linhas = np.empty((altura, 1 + self.largura * 3), dtype=np.uint8)
+        linhas[:, 0] = 1
+        rgb = linhas[:, 1:].reshape(altura, self.largura, 3)
+        rgb[:] = faixa_bgr[:, :, ::-1]
+        np.subtract(rgb[:, 1:], faixa_bgr[:, :-1, ::-1], out=rgb[:, 1:])
+        dados = self._compressor.compress(linhas)
+        if dados:
+            self._bloco(b'IDAT', dados)
+        self.linhas += altura
+
+    def fechar(self):
+        try:
+            self._bloco(b'IDAT', self._compressor.flush())
+            self._bloco(b'IEND', b'')
+        finally:
+            self._arquivo.close()
+
+    def _bloco(self, tipo, dados):
+        self._arquivo.write(struct.pack('>I', len(dados)) + tipo)
+        self._arquivo.write(dados)
+        self._arquivo.write(struct.pack('>I', zlib.crc32(dados, zlib.crc32(tipo)) & 0xFFFFFFFF))
@@ -39,16 +39,24 @@ Impressão: pywin32
    - Para sair do programa: pressione ESC + Q simultaneamente
 
 5. PERSONALIZAÇÃO:
-   - Coloque molduras (PNG com transparência) na pasta "molduras"
+   - Coloque molduras (PNG com transparência ou especificações JSON) na pasta "molduras"
    - Molduras recomendadas: resolução 2480x3508 pixels (A4) ou proporcionais
    - Ajuste a resolução de captura modificando a variável CAMERA_RESOLUTION
+   - Para várias cabines no mesmo computador, liste as câmeras em ESTACOES (a tela é dividida)
+   - Gradações de cor da marca (arquivos .cube) colocadas na pasta "filtros" aparecem
+     no botão de filtros da tela de captura
+   - Os convidados baixam as fotos pelo celular na galeria (http://<ip do computador>:8080/),
+     na mesma rede Wi-Fi; o endereço aparece no console ao iniciar (GALERIA, PORTA_GALERIA)
 """
 
 # Importações necessárias
 import os
 import sys
+import threading
 import time
-from datetime import datetime
+
+# Início do programa, para medir o tempo até a primeira tela
+INICIO_PROGRAMA = time.perf_counter()
 
 # Configurações da interface gráfica Kivy
 from kivy.app import App
@@ -60,102 +68,305 @@ Config.set('input', 'mouse', 'mouse,multitouch_on_demand')  # Desativa multitouc
 
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.image import Image as KivyImage
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.image import Image as KivyImage, AsyncImage
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recyclegridlayout import RecycleGridLayout
 from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.core.window import Window
+from kivy.uix.widget import Widget
 from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
 from kivy.graphics.texture import Texture
 
-# Biblioteca de captura de vídeo
-import cv2
-
-# Biblioteca para processamento de imagem
-from PIL import Image, ImageDraw, ImageFont
-
-# Biblioteca para impressão no Windows (com tratamento para ambientes não-Windows)
-try:
-    import win32print
-    import win32ui
-    from PIL import ImageWin
-    WINDOWS_AVAILABLE = True
-except ImportError:
-    WINDOWS_AVAILABLE = False
-    print("[AVISO] Bibliotecas do Windows não disponíveis. A impressão não funcionará.")
+# As bibliotecas pesadas (OpenCV, NumPy, Pillow, pywin32) e os módulos que dependem
+# delas são importados em segundo plano, com a tela de boas-vindas já visível
+# (ver PhotoBoothApp.aquecer)
+from metricas import Metricas
 
 # Definições globais
 CAMERA_ID = 0  # ID da câmera (geralmente 0 para webcam interna, 1 para externa)
+ESTACOES = None  # Várias cabines na mesma janela, uma por câmera, ex.: [0, 1] (None = só CAMERA_ID)
 CAMERA_RESOLUTION = (1280, 720)  # Resolução da captura (ajuste conforme sua câmera)
+CAMERA_RESOLUCAO_PREVIEW = None  # Resolução menor para o preview, ex.: (640, 360) (None = a mesma da foto)
+CAMERA_FPS = 30  # FPS pedido à câmera
+CAMERA_FORMATOS = ('MJPG', 'YUY2')  # Formatos tentados, em ordem (MJPG dá FPS cheio na maioria das webcams USB)
+CAMERA_FALSA = False  # Usa uma câmera simulada (camera.CameraFalsa) para testes sem câmera conectada
 PRINT_SIZE = (2480, 3508)  # Tamanho de impressão A4 em pixels (300 DPI)
 COUNTDOWN_TIME = 3  # Tempo de contagem regressiva em segundos
 PREVIEW_TIME = 5  # Tempo de exibição do preview em segundos
+PREVIEW_COM_MOLDURA = True  # Mostra a moldura sobre o feed da câmera durante a captura (camada na GPU)
+FILTROS = True  # Botão de filtros de cor na captura (P&B, sépia, quente, frio, vintage e os .cube da pasta)
+PASTA_FILTROS = 'filtros'  # Gradações de cor da marca em arquivos .cube
+CACHE_MOLDURAS_MB = 512  # Memória máxima usada pelo cache de molduras decodificadas
+TAMANHOS_MOLDURA = {  # Variantes pré-redimensionadas mantidas no cache
+    'impressao': PRINT_SIZE,
+    'preview': (1080, 1080),
+    'miniatura': (300, 300),
+}
+MODO_RENDER = 'thread'  # 'thread' ou 'processo' (composição fora da thread da interface)
+TRABALHADORES_RENDER = 2  # Número de trabalhadores do pool de renderização
+PASTA_MINIATURAS = 'cache_miniaturas'  # Pasta do cache de miniaturas da galeria
+IMPRESSORA = 'auto'  # 'windows', 'virtual' (grava em pasta) ou 'auto' (windows se disponível)
+PASTA_IMPRESSORA_VIRTUAL = 'impressoes'  # Pasta onde a impressora virtual grava as páginas
+PASTA_FILA_IMPRESSAO = 'fila_impressao'  # Trabalhos de impressão pendentes (sobrevivem a reinícios)
+TENTATIVAS_IMPRESSAO = 5  # Tentativas por trabalho antes de desistir
+TAMANHO_FOLHA_IMPRESSORA = None  # Folha na resolução da impressora, ex.: (4960, 7016) para A4 em 600 DPI (None = PRINT_SIZE)
+LINHAS_FAIXA_IMPRESSAO = 256  # Linhas da folha montadas e enviadas de cada vez (limita a memória da impressão)
+IMPOSICAO = '1-up'  # Montagem da folha no evento: '1-up', '2-up', '4-up', '2-convidados', ... (imposicao.LAYOUTS)
+IMPOSICAO_POR_MOLDURA = {}  # Montagem por moldura (nome do arquivo sem extensão), ex.: {'moldura_azul_decorada': '2-up'}
+TIRINHA = {  # Modo tirinha: várias fotos seguidas montadas em grade na mesma folha
+    'fotos': 4,
+    'colunas': 2,
+    'margem': 60,  # Margem entre as fotos, em pixels de impressão
+}
+PASTA_METRICAS = 'metricas'  # Métricas de desempenho (JSON-lines rotativo + arquivo do Prometheus)
+INTERVALO_METRICAS = 15  # Intervalo de exportação das métricas em segundos
+SALVAR_FOTOS = True  # Arquiva todas as fotos em disco (em segundo plano)
+PASTA_FOTOS = 'fotos'  # As fotos ficam em fotos/<evento>/<sessão>
+EVENTO = None  # Nome do evento (padrão: data do dia)
+FORMATO_FOTOS = 'jpg'  # 'jpg', 'png' ou 'webp'
+QUALIDADE_FOTOS = 95  # Qualidade de compressão (jpg e webp)
+SALVAR_ORIGINAL = False  # Guarda também o frame original da câmera ao lado da foto composta
+GALERIA = True  # Galeria na rede local para os convidados baixarem as fotos pelo celular (exige SALVAR_FOTOS)
+PORTA_GALERIA = 8080  # Porta HTTP da galeria
+PASTA_GALERIA = 'cache_galeria'  # Versões reduzidas das fotos servidas pela galeria
+TAMANHOS_GALERIA = {  # Versões geradas uma vez para cada foto
+    'pequena': (320, 320),
+    'media': (1080, 1080),
+}
+FOTOS_POR_PAGINA_GALERIA = 24  # Fotos por página da galeria
 
 class PhotoBoothApp(App):
     def __init__(self, **kwargs):
         super(PhotoBoothApp, self).__init__(**kwargs)
         self.title = "Cabine Fotográfica"
-        self.moldura_selecionada = None
-        self.camera = None
-        self.ultima_foto = None
+        self.metricas = Metricas(PASTA_METRICAS, INTERVALO_METRICAS)
+        # Estações (câmera + telas + sessão do convidado) que dividem a janela
+        self.estacoes = []
+        # Serviços compartilhados por todas as estações, criados pelo aquecimento (ver aquecer)
+        self.pronto = False
+        self.cache_molduras = None
+        self.executor_render = None
+        self.cache_miniaturas = None
+        self.fila_impressao = None
+        self.gravador_fotos = None
+        self.galeria = None
+        # Filtros de cor oferecidos na captura (None = sem filtro)
+        self.filtros = [None]
+        
+        # Duração de cada fase da inicialização
+        self.fases_inicio = []
+        self._inicio_fase = INICIO_PROGRAMA
+        self.marcar_fase('importacoes')
+
+    def marcar_fase(self, fase):
+        """Registra a duração da fase da inicialização que acabou de terminar"""
+        agora = time.perf_counter()
+        self.fases_inicio.append((fase, agora - self._inicio_fase))
+        self.metricas.registrar(f'inicio_{fase}', agora - self._inicio_fase)
+        self._inicio_fase = agora
 
     def build(self):
+        # A janela é importada aqui para que os processos de renderização (modo 'processo'),
+        # que reimportam este arquivo no Windows, não abram uma janela própria
+        from kivy.core.window import Window
+        
         # Registra teclas para sair (ESC + Q)
         self._keyboard = Window.request_keyboard(self._keyboard_closed, self.root)
         self._keyboard.bind(on_key_down=self._on_keyboard_down)
         
-        # Configuração do gerenciador de telas
-        self.sm = ScreenManager()
-        
-        # Tela de boas-vindas
-        self.welcome_screen = WelcomeScreen(name='welcome')
-        self.sm.add_widget(self.welcome_screen)
+        # Uma estação por câmera; com mais de uma, a janela é dividida entre elas.
+        # Só as telas de boas-vindas são criadas antes da primeira imagem na tela
+        for indice, camera_id in enumerate(ESTACOES or [CAMERA_ID]):
+            self.estacoes.append(EstacaoCabine(camera_id, nome=f"estacao_{indice + 1}"))
+        if len(self.estacoes) == 1:
+            raiz = self.estacoes[0]
+        else:
+            raiz = BoxLayout(orientation='horizontal', spacing=4)
+            for estacao in self.estacoes:
+                raiz.add_widget(estacao)
+        Window.bind(on_flip=self.primeira_tela_exibida)
         
-        # Tela de seleção de moldura
-        self.frame_select_screen = FrameSelectScreen(name='frame_select')
-        self.sm.add_widget(self.frame_select_screen)
+        self.marcar_fase('interface')
+        return raiz
+
+    def primeira_tela_exibida(self, *args):
+        """Chamado quando a tela de boas-vindas aparece: cria as demais telas e inicia o aquecimento"""
+        from kivy.core.window import Window
+        Window.unbind(on_flip=self.primeira_tela_exibida)
+        self.marcar_fase('primeira_tela')
+        print(f"[INFO] Primeira tela exibida em {time.perf_counter() - INICIO_PROGRAMA:.2f}s")
         
-        # Tela de captura
-        self.capture_screen = CaptureScreen(name='capture')
-        self.sm.add_widget(self.capture_screen)
+        for estacao in self.estacoes:
+            estacao.criar_telas()
+        self.marcar_fase('telas')
         
-        # Tela de exibição da foto final
-        self.preview_screen = PreviewScreen(name='preview')
-        self.sm.add_widget(self.preview_screen)
-        
-        return self.sm
+        threading.Thread(target=self.aquecer, name='aquecimento', daemon=True).start()
 
     def on_start(self):
         """Método chamado quando o aplicativo inicia"""
         print("[INFO] Iniciando aplicativo...")
+        self.metricas.iniciar()
+
+    def aquecer(self):
+        """Importa as bibliotecas pesadas e cria os serviços em segundo plano
+
+        Roda com a tela de boas-vindas já visível; o botão INICIAR é liberado no fim.
+        """
+        try:
+            import cv2
+            from impressao import FilaImpressao, ImpressoraWindows, ImpressoraVirtual, WINDOWS_AVAILABLE
+            from cache_molduras import CacheMolduras
+            from render import ExecutorRender
+            from camera import ThreadCaptura
+            from miniaturas import CacheMiniaturas
+            from gravador import GravadorFotos
+            self.marcar_fase('importacoes_pesadas')
+            
+            # Abre e negocia cada câmera uma única vez; elas ficam abertas (pausadas) durante
+            # toda a execução, cada uma na sua thread de captura, sem o convidado esperar a
+            # abertura a cada moldura (CAP_DSHOW para melhor compatibilidade no Windows)
+            for estacao in self.estacoes:
+                fabrica = cv2.VideoCapture
+                if CAMERA_FALSA:
+                    from camera import CameraFalsa
+                    fabrica = lambda *args, semente=estacao.camera_id: CameraFalsa(
+                        None, CAMERA_RESOLUTION, CAMERA_FPS, semente=semente
+                    )
+                estacao.captura = ThreadCaptura(
+                    estacao.camera_id, CAMERA_RESOLUTION, cv2.CAP_DSHOW, fabrica=fabrica, metricas=self.metricas,
+                    resolucao_preview=CAMERA_RESOLUCAO_PREVIEW, fps=CAMERA_FPS, formatos=CAMERA_FORMATOS
+                )
+                estacao.captura.iniciar(pausada=True)
+            
+            # Cache das molduras decodificadas e motor de composição (um só para todas as estações)
+            self.cache_molduras = CacheMolduras(CACHE_MOLDURAS_MB, TAMANHOS_MOLDURA)
+            self.executor_render = ExecutorRender(self.cache_molduras, MODO_RENDER, TRABALHADORES_RENDER)
+            self.cache_miniaturas = CacheMiniaturas(PASTA_MINIATURAS, TAMANHOS_MOLDURA['miniatura'])
+            
+            # Inicia a fila de impressão (retoma trabalhos que ficaram pendentes)
+            if IMPRESSORA == 'windows' or (IMPRESSORA == 'auto' and WINDOWS_AVAILABLE):
+                impressora = ImpressoraWindows(TAMANHO_FOLHA_IMPRESSORA or PRINT_SIZE)
+            else:
+                if IMPRESSORA == 'auto':
+                    print("[AVISO] Bibliotecas do Windows não disponíveis. "
+                          "As impressões irão para a impressora virtual.")
+                impressora = ImpressoraVirtual(TAMANHO_FOLHA_IMPRESSORA or PRINT_SIZE, PASTA_IMPRESSORA_VIRTUAL)
+            self.fila_impressao = FilaImpressao(
+                impressora,
+                PASTA_FILA_IMPRESSAO,
+                tentativas=TENTATIVAS_IMPRESSAO,
+                imposicao=IMPOSICAO,
+                altura_faixa=LINHAS_FAIXA_IMPRESSAO,
+                ao_mudar_status=lambda trabalho: Clock.schedule_once(
+                    lambda dt: self.atualizar_status_impressao(trabalho)
+                ),
+                metricas=self.metricas
+            )
+            
+            # Grava as fotos em segundo plano, sem atrasar o convidado; cada foto gravada
+            # entra na galeria da rede local
+            if SALVAR_FOTOS:
+                if GALERIA:
+                    self.iniciar_galeria()
+                self.gravador_fotos = GravadorFotos(
+                    PASTA_FOTOS, EVENTO, FORMATO_FOTOS, QUALIDADE_FOTOS, SALVAR_ORIGINAL,
+                    ao_salvar=self.galeria.adicionar if self.galeria is not None else None,
+                    metricas=self.metricas
+                )
+            self.marcar_fase('servicos')
+            
+            # Verifica se a pasta de molduras existe
+            if not os.path.exists('molduras'):
+                os.makedirs('molduras')
+                print("[INFO] Pasta 'molduras' criada. Adicione os arquivos PNG ou JSON das molduras.")
+            
+            # Verifica se existem molduras na pasta e gera as miniaturas novas ou alteradas
+            molduras = self.carregar_molduras()
+            if not molduras:
+                print("[AVISO] Não foram encontradas molduras na pasta 'molduras'.")
+                print("[AVISO] Adicione arquivos PNG com transparência (ou JSON) e reinicie o aplicativo.")
+            self.cache_miniaturas.gerar_faltantes(molduras)
+            self.marcar_fase('catalogo_molduras')
+            
+            # Calcula as tabelas dos filtros antes do primeiro convidado
+            if FILTROS:
+                self.carregar_filtros()
+                self.marcar_fase('filtros')
+        except Exception as e:
+            print(f"[ERRO] Falha ao preparar a cabine: {e}")
+            Clock.schedule_once(lambda dt: self.mostrar_erro_inicio())
+            return
         
-        # Verifica se a pasta de molduras existe
-        if not os.path.exists('molduras'):
-            os.makedirs('molduras')
-            print("[INFO] Pasta 'molduras' criada. Adicione os arquivos PNG das molduras.")
+        Clock.schedule_once(lambda dt: self.concluir_aquecimento())
+
+    def carregar_filtros(self):
+        """Prepara os filtros prontos e os .cube da pasta de filtros (os inválidos ficam de fora)"""
+        from filtros import listar_filtros, obter_filtro
+        filtros = [None]
+        for identificador in listar_filtros(PASTA_FILTROS):
+            try:
+                obter_filtro(identificador)
+                filtros.append(identificador)
+            except (OSError, ValueError) as e:
+                print(f"[ERRO] Filtro {identificador} ignorado: {e}")
+        self.filtros = filtros
+
+    def iniciar_galeria(self):
+        """Inicia o servidor da galeria durante o aquecimento (sem ela a cabine continua funcionando)"""
+        from galeria import ServidorGaleria
+        try:
+            self.galeria = ServidorGaleria(
+                PASTA_FOTOS, PASTA_GALERIA, PORTA_GALERIA, TAMANHOS_GALERIA,
+                FOTOS_POR_PAGINA_GALERIA, metricas=self.metricas
+            )
+            self.galeria.iniciar()
+        except OSError as e:
+            print(f"[ERRO] Falha ao iniciar a galeria na porta {PORTA_GALERIA}: {e}")
+            self.galeria = None
+
+    def concluir_aquecimento(self):
+        """Libera o início do atendimento e informa as fases da inicialização (thread da interface)"""
+        self.pronto = True
+        for estacao in self.estacoes:
+            estacao.welcome_screen.mostrar_pronto()
+        self.marcar_fase('pronto')
         
-        # Verifica se existem molduras na pasta
-        molduras = [f for f in os.listdir('molduras') if f.lower().endswith('.png')]
-        if not molduras:
-            print("[AVISO] Não foram encontradas molduras na pasta 'molduras'.")
-            print("[AVISO] Adicione arquivos PNG com transparência e reinicie o aplicativo.")
+        fases = ", ".join(f"{fase} {duracao:.2f}s" for fase, duracao in self.fases_inicio)
+        print(f"[INFO] Inicialização: {fases}")
+        print(f"[INFO] Cabine pronta em {time.perf_counter() - INICIO_PROGRAMA:.2f}s")
+
+    def mostrar_erro_inicio(self):
+        """Informa em todas as estações que a cabine não conseguiu se preparar"""
+        for estacao in self.estacoes:
+            estacao.welcome_screen.mostrar_erro_inicio()
 
     def on_stop(self):
         """Método chamado quando o aplicativo é encerrado"""
         print("[INFO] Encerrando aplicativo...")
-        # Libera a câmera se estiver aberta
-        if hasattr(self, 'camera') and self.camera is not None:
-            self.camera.release()
-            print("[INFO] Câmera liberada.")
+        if self.executor_render is not None:
+            self.executor_render.encerrar()
+        if self.cache_miniaturas is not None:
+            self.cache_miniaturas.encerrar()
+        if self.fila_impressao is not None:
+            self.fila_impressao.encerrar()
+        if self.gravador_fotos is not None:
+            self.gravador_fotos.encerrar()
+        if self.galeria is not None:
+            self.galeria.encerrar()
+        # Para as threads de captura e libera as câmeras
+        for estacao in self.estacoes:
+            estacao.encerrar()
+        self.metricas.encerrar()
 
     def carregar_molduras(self):
         """Carrega as molduras disponíveis na pasta 'molduras'"""
         molduras = []
         try:
             for arquivo in os.listdir('molduras'):
-                if arquivo.lower().endswith('.png'):
+                if arquivo.lower().endswith(('.png', '.json')):
                     caminho_completo = os.path.join('molduras', arquivo)
                     molduras.append(caminho_completo)
         except Exception as e:
@@ -163,155 +374,247 @@ class PhotoBoothApp(App):
         
         return molduras
 
+    def atualizar_status_impressao(self, trabalho):
+        """Repassa a mudança de estado de uma impressão para as estações (thread da interface)"""
+        from impressao import FALHOU  # já carregado pelo aquecimento
+        pendentes = self.fila_impressao.pendentes()
+        for estacao in self.estacoes:
+            estacao.atualizar_status_impressao(trabalho, pendentes, trabalho['status'] == FALHOU)
+
+    def _keyboard_closed(self):
+        """Chamado quando o teclado é fechado"""
+        self._keyboard.unbind(on_key_down=self._on_keyboard_down)
+        self._keyboard = None
+
+    def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
+        """Gerencia pressionamentos de tecla"""
+        # Combinação de tecla ESC (27) + Q (113) para sair
+        if keycode[0] == 27 and 'q' in modifiers:
+            self.stop()
+        return True
+
+
+class EstacaoCabine(ScreenManager):
+    """Uma cabine (câmera, telas e sessão do convidado) dentro do aplicativo
+
+    Cada estação tem a sua thread de captura, a moldura escolhida e a última foto;
+    o cache de molduras, o pool de renderização, a fila de impressão e o gravador
+    são os do PhotoBoothApp, compartilhados por todas as estações.
+    """
+
+    def __init__(self, camera_id, nome='estacao_1', **kwargs):
+        super(EstacaoCabine, self).__init__(**kwargs)
+        self.camera_id = camera_id
+        self.nome = nome
+        self.captura = None
+        self.moldura_selecionada = None
+        self.filtro_selecionado = None
+        self.ultima_foto = None
+        self.frames_originais = []
+        self.trabalho_impressao = None
+        self.celulas_tirinha = []
+        self.instante_composicao = None
+        
+        # Só a tela de boas-vindas é criada antes da primeira imagem na tela
+        self.welcome_screen = WelcomeScreen(name='welcome')
+        self.add_widget(self.welcome_screen)
+        self.frame_select_screen = None
+        self.capture_screen = None
+        self.preview_screen = None
+
+    def criar_telas(self):
+        """Cria as demais telas da estação"""
+        # Tela de seleção de moldura
+        self.frame_select_screen = FrameSelectScreen(name='frame_select')
+        self.add_widget(self.frame_select_screen)
+        
+        # Tela de captura
+        self.capture_screen = CaptureScreen(name='capture')
+        self.add_widget(self.capture_screen)
+        
+        # Tela de exibição da foto final
+        self.preview_screen = PreviewScreen(name='preview')
+        self.add_widget(self.preview_screen)
+
+    def encerrar(self):
+        """Para a thread de captura e libera a câmera da estação"""
+        if self.capture_screen is not None:
+            self.capture_screen.parar_camera()
+        if self.captura is not None:
+            self.captura.parar()
+            print(f"[INFO] Captura da {self.nome} encerrada: {self.captura.frames_capturados} frames, "
+                  f"{self.captura.frames_descartados} descartados, {self.captura.reconexoes} reconexões")
+
     def selecionar_moldura(self, moldura_path):
         """Seleciona a moldura e avança para a tela de captura"""
         self.moldura_selecionada = moldura_path
         print(f"[INFO] Moldura selecionada: {moldura_path}")
         
+        # Prepara a moldura em segundo plano enquanto o preview começa
+        app = App.get_running_app()
+        app.executor_render.precarregar(moldura_path)
+        if PREVIEW_COM_MOLDURA:
+            self.capture_screen.preparar_sobreposicao(moldura_path)
+        
         # Configura a tela de captura
         self.capture_screen.setup_camera()
         
         # Muda para a tela de captura
-        self.sm.current = 'capture'
+        self.current = 'capture'
+
+    def proximo_filtro(self):
+        """Passa para o próximo filtro de cor (depois do último volta para sem filtro)"""
+        filtros = App.get_running_app().filtros
+        indice = filtros.index(self.filtro_selecionado) if self.filtro_selecionado in filtros else 0
+        self.filtro_selecionado = filtros[(indice + 1) % len(filtros)]
+        self.capture_screen.mostrar_filtro(self.filtro_selecionado)
 
     def tirar_foto(self):
         """Inicia o processo de contagem regressiva e captura"""
         self.capture_screen.iniciar_contagem()
 
     def processar_e_mostrar_foto(self, frame):
-        """Processa a foto capturada aplicando a moldura selecionada"""
+        """Envia a foto capturada para composição em segundo plano e mostra o progresso"""
         if self.moldura_selecionada is None:
             print("[ERRO] Nenhuma moldura selecionada")
             return
         
+        # Mostra a tela de preview em estado de processamento enquanto a foto é composta
+        self.preview_screen.mostrar_processando()
+        self.current = 'preview'
+        
+        # Compõe a foto no pool de renderização; o resultado volta para a thread da interface
+        self.frames_originais = [frame]
+        self.instante_composicao = time.monotonic()
+        futuro = App.get_running_app().executor_render.submeter(
+            frame, self.moldura_selecionada, self.filtro_selecionado
+        )
+        futuro.add_done_callback(
+            lambda f: Clock.schedule_once(lambda dt: self.mostrar_foto_renderizada(f))
+        )
+
+    def adicionar_foto_tirinha(self, frame, indice, total):
+        """Envia uma foto da tirinha para composição assim que ela é tirada
+
+        A foto N é composta enquanto a contagem da foto N+1 acontece; depois da
+        última foto só falta montar a folha.
+        """
+        if self.moldura_selecionada is None:
+            print("[ERRO] Nenhuma moldura selecionada")
+            return
+        
+        if indice == 0:
+            self.celulas_tirinha = []
+            self.frames_originais = []
+        self.frames_originais.append(frame)
+        
+        from render import tamanho_celula_tirinha  # já carregado pelo aquecimento
+        tamanho_celula = tamanho_celula_tirinha(PRINT_SIZE, total, TIRINHA['colunas'], TIRINHA['margem'])
+        futuro = App.get_running_app().executor_render.submeter_celula(
+            frame, self.moldura_selecionada, tamanho_celula, self.filtro_selecionado
+        )
+        self.celulas_tirinha.append(futuro)
+        
+        if indice + 1 == total:
+            # Última foto: mostra o processamento e monta a folha quando todas estiverem prontas
+            self.instante_composicao = time.monotonic()
+            self.preview_screen.mostrar_processando()
+            self.current = 'preview'
+            for futuro in self.celulas_tirinha:
+                futuro.add_done_callback(
+                    lambda f: Clock.schedule_once(lambda dt: self.montar_tirinha())
+                )
+
+    def montar_tirinha(self):
+        """Monta a tirinha quando todas as fotos estiverem compostas (thread da interface)"""
+        celulas = self.celulas_tirinha
+        if not celulas or not all(futuro.done() for futuro in celulas):
+            return
+        self.celulas_tirinha = []
+        
         try:
-            # Converte o frame do OpenCV para o formato PIL
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img_capturada = Image.fromarray(frame_rgb)
-            
-            # Carrega a moldura selecionada
-            moldura = Image.open(self.moldura_selecionada).convert("RGBA")
-            
-            # Redimensiona a imagem capturada para o tamanho da moldura
-            # mantendo a proporção e centralizando
-            img_width, img_height = img_capturada.size
-            moldura_width, moldura_height = moldura.size
-            
-            # Calcula a nova resolução mantendo proporção
-            ratio = min(moldura_width/img_width, moldura_height/img_height)
-            new_size = (int(img_width * ratio), int(img_height * ratio))
-            img_redimensionada = img_capturada.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Cria uma nova imagem para receber a foto e a moldura
-            foto_final = Image.new("RGBA", (moldura_width, moldura_height), (255, 255, 255, 0))
-            
-            # Centraliza a imagem capturada
-            offset_x = (moldura_width - new_size[0]) // 2
-            offset_y = (moldura_height - new_size[1]) // 2
-            foto_final.paste(img_redimensionada, (offset_x, offset_y))
-            
-            # Aplica a moldura por cima da imagem capturada
-            foto_final = Image.alpha_composite(foto_final, moldura)
-            
-            # Converte para RGB para salvar/imprimir
-            foto_final_rgb = foto_final.convert("RGB")
-            
-            # Atualiza a referência para a última foto
-            self.ultima_foto = foto_final_rgb
-            
-            # Exibe a foto na tela de preview
-            self.preview_screen.mostrar_foto(foto_final_rgb)
-            self.sm.current = 'preview'
-            
-            # Agenda a impressão para depois de um tempo
-            Clock.schedule_once(lambda dt: self.imprimir_foto(), PREVIEW_TIME)
-            
+            fotos = [futuro.result() for futuro in celulas]
+        except Exception as e:
+            print(f"[ERRO] Falha ao processar a tirinha: {e}")
+            self.preview_screen.mostrar_erro()
+            Clock.schedule_once(lambda dt: self.voltar_inicio(), 2)
+            return
+        
+        futuro = App.get_running_app().executor_render.submeter_tirinha(
+            fotos, PRINT_SIZE, TIRINHA['colunas'], TIRINHA['margem']
+        )
+        futuro.add_done_callback(
+            lambda f: Clock.schedule_once(lambda dt: self.mostrar_foto_renderizada(f))
+        )
+
+    def mostrar_foto_renderizada(self, futuro):
+        """Exibe a foto composta (chamado na thread da interface)"""
+        try:
+            foto = futuro.result()
         except Exception as e:
             print(f"[ERRO] Falha ao processar a foto: {e}")
+            self.preview_screen.mostrar_erro()
+            Clock.schedule_once(lambda dt: self.voltar_inicio(), 2)
+            return
+        
+        # Tempo que o convidado esperou entre a (última) foto e o resultado composto
+        if self.instante_composicao is not None:
+            App.get_running_app().metricas.registrar('composicao', time.monotonic() - self.instante_composicao)
+            self.instante_composicao = None
+        
+        # Atualiza a referência para a última foto (já na resolução de impressão)
+        self.ultima_foto = foto.impressao
+        self.salvar_foto()
+        
+        # Exibe na tela a versão reduzida, sem enviar a foto inteira como textura
+        with App.get_running_app().metricas.cronometrar('textura_preview'):
+            self.preview_screen.mostrar_foto(foto.preview)
+        
+        # Agenda a impressão para depois de um tempo
+        Clock.schedule_once(lambda dt: self.imprimir_foto(), PREVIEW_TIME)
 
     def imprimir_foto(self):
-        """Imprime a foto usando a impressora padrão do Windows"""
+        """Coloca a foto na fila de impressão e volta para o início sem esperar a impressora"""
         if self.ultima_foto is None:
             print("[ERRO] Nenhuma foto para imprimir")
             return
         
         try:
-            # Redimensiona a imagem para o tamanho de impressão
-            foto_para_impressao = self.ultima_foto.copy()
-            foto_para_impressao = foto_para_impressao.resize(PRINT_SIZE, Image.Resampling.LANCZOS)
-            
-            if WINDOWS_AVAILABLE:
-                # Obtém o nome da impressora padrão
-                impressora_padrao = win32print.GetDefaultPrinter()
-                print(f"[INFO] Imprimindo na impressora padrão: {impressora_padrao}")
-                
-                # Configura o DC da impressora
-                hDC = win32ui.CreateDC()
-                hDC.CreatePrinterDC(impressora_padrao)
-                hDC.StartDoc("Cabine Fotográfica")
-                hDC.StartPage()
-                
-                # Imprime a imagem
-                dib = ImageWin.Dib(foto_para_impressao)
-                dib.draw(hDC.GetHandleOutput(), (0, 0, PRINT_SIZE[0], PRINT_SIZE[1]))
-                
-                hDC.EndPage()
-                hDC.EndDoc()
-                hDC.DeleteDC()
-                
-                print("[INFO] Foto enviada para impressão com sucesso!")
-            else:
-                print("[AVISO] Impressão não disponível - ambiente não-Windows detectado")
-                # Em um ambiente não-Windows, podemos salvar a imagem como alternativa
-                self.salvar_foto()
-            
-            # Opcional: Salvar a imagem (sempre, independente do ambiente)
-            # self.salvar_foto()
-            
-            # Retorna à tela inicial após impressão/visualização
-            Clock.schedule_once(lambda dt: self.voltar_inicio(), 2)
-            
+            # A impressão acontece em segundo plano, com novas tentativas em caso de falha;
+            # a montagem da folha pode ser específica da moldura
+            nome_moldura = os.path.splitext(os.path.basename(self.moldura_selecionada or ''))[0]
+            self.trabalho_impressao = App.get_running_app().fila_impressao.adicionar(
+                self.ultima_foto, IMPOSICAO_POR_MOLDURA.get(nome_moldura)
+            )
         except Exception as e:
-            print(f"[ERRO] Falha ao imprimir/processar: {e}")
-            # Em caso de erro, também volta para a tela inicial
-            Clock.schedule_once(lambda dt: self.voltar_inicio(), 2)
+            print(f"[ERRO] Falha ao enviar para a fila de impressão: {e}")
+        
+        # Retorna à tela inicial após a visualização
+        Clock.schedule_once(lambda dt: self.voltar_inicio(), 2)
+
+    def atualizar_status_impressao(self, trabalho, pendentes, falhou):
+        """Mostra o estado da impressão nas telas desta estação (thread da interface)"""
+        if trabalho['id'] == self.trabalho_impressao:
+            self.preview_screen.mostrar_status_impressao(trabalho)
+        
+        # Na tela inicial mostra se há impressões na fila (de todas as estações) ou com falha
+        self.welcome_screen.mostrar_status_impressao(pendentes, falhou)
     
     def salvar_foto(self):
-        """Função para salvar a foto (opcional, não é usada por padrão)"""
-        if self.ultima_foto is None:
+        """Agenda a gravação da última foto (e dos frames originais) em segundo plano"""
+        gravador_fotos = App.get_running_app().gravador_fotos
+        if self.ultima_foto is None or gravador_fotos is None:
             return
         
-        try:
-            # Cria pasta 'fotos' se não existir
-            if not os.path.exists('fotos'):
-                os.makedirs('fotos')
-                
-            # Gera nome de arquivo baseado na data e hora
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"fotos/foto_{timestamp}.jpg"
-            
-            # Salva a imagem
-            self.ultima_foto.save(filename, "JPEG", quality=95)
-            print(f"[INFO] Foto salva em: {filename}")
-            
-        except Exception as e:
-            print(f"[ERRO] Falha ao salvar a foto: {e}")
+        gravador_fotos.salvar(self.ultima_foto, self.frames_originais)
+        self.frames_originais = []
 
     def voltar_inicio(self):
-        """Retorna à tela inicial (boas-vindas)"""
-        self.sm.current = 'welcome'
-
-    def _keyboard_closed(self):
-        """Chamado quando o teclado é fechado"""
-        self._keyboard.unbind(on_key_down=self._on_keyboard_down)
-        self._keyboard = None
-
-    def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
-        """Gerencia pressionamentos de tecla"""
-        # Combinação de tecla ESC (27) + Q (113) para sair
-        if keycode[0] == 27 and 'q' in modifiers:
-            self.stop()
-        return True
+        """Retorna à tela inicial (boas-vindas); o próximo convidado começa sem filtro"""
+        self.filtro_selecionado = None
+        if self.capture_screen is not None:
+            self.capture_screen.mostrar_filtro(None)
+        self.current = 'welcome'
 
 
 class WelcomeScreen(Screen):
@@ -344,16 +647,17 @@ class WelcomeScreen(Screen):
         top_layout.add_widget(subtitulo)
         layout.add_widget(top_layout)
         
-        # Botão para iniciar
-        btn_iniciar = Button(
-            text="INICIAR",
+        # Botão para iniciar (desativado até a cabine terminar de se preparar)
+        self.btn_iniciar = Button(
+            text="PREPARANDO...",
             font_size='40sp',
             size_hint=(0.5, 0.4),
             pos_hint={'center_x': 0.5},
-            background_color=(0.2, 0.7, 0.3, 1)
+            background_color=(0.2, 0.7, 0.3, 1),
+            disabled=True
         )
-        btn_iniciar.bind(on_release=self.go_to_frame_select)
-        layout.add_widget(btn_iniciar)
+        self.btn_iniciar.bind(on_release=self.go_to_frame_select)
+        layout.add_widget(self.btn_iniciar)
         
         # Rodapé com instruções
         instrucao = Label(
@@ -364,13 +668,77 @@ class WelcomeScreen(Screen):
         )
         layout.add_widget(instrucao)
         
+        # Estado da fila de impressão (vazio quando não há nada pendente)
+        self.lbl_impressao = Label(
+            text="",
+            font_size='18sp',
+            color=(0.8, 0.8, 0.8, 1),
+            size_hint=(1, 0.1)
+        )
+        layout.add_widget(self.lbl_impressao)
+        
         self.add_widget(layout)
 
+    def mostrar_pronto(self):
+        """Libera o botão INICIAR quando a cabine termina de se preparar"""
+        self.btn_iniciar.text = "INICIAR"
+        self.btn_iniciar.disabled = False
+
+    def mostrar_erro_inicio(self):
+        """Informa que a cabine não conseguiu se preparar"""
+        self.btn_iniciar.text = "ERRO AO INICIAR"
+        self.lbl_impressao.text = "Verifique as mensagens no terminal e reinicie o programa"
+        self.lbl_impressao.color = (1, 0.4, 0.4, 1)
+
+    def mostrar_status_impressao(self, pendentes, falhou):
+        """Mostra quantas impressões estão na fila e se alguma falhou"""
+        if falhou:
+            self.lbl_impressao.text = "Falha na impressora - verifique papel e tinta"
+            self.lbl_impressao.color = (1, 0.4, 0.4, 1)
+        elif pendentes:
+            self.lbl_impressao.text = f"Impressões na fila: {pendentes}"
+            self.lbl_impressao.color = (0.8, 0.8, 0.8, 1)
+        else:
+            self.lbl_impressao.text = ""
+
     def go_to_frame_select(self, instance):
         """Navega para a tela de seleção de molduras"""
-        app = App.get_running_app()
-        app.frame_select_screen.carregar_lista_molduras()
-        app.sm.current = 'frame_select'
+        self.manager.frame_select_screen.carregar_lista_molduras()
+        self.manager.current = 'frame_select'
+
+
+class TileMoldura(RecycleDataViewBehavior, BoxLayout):
+    """Item da galeria de molduras, reaproveitado pelo RecycleView durante a rolagem"""
+
+    def __init__(self, **kwargs):
+        super(TileMoldura, self).__init__(orientation='vertical', spacing=10, **kwargs)
+        self.moldura_path = None
+        self.miniatura = ''
+        # Tela de seleção (e, por ela, a estação) à qual o item pertence
+        self.tela = None
+        
+        # Miniatura carregada de forma assíncrona quando o item aparece na tela
+        self.img = AsyncImage(allow_stretch=True, keep_ratio=True)
+        self.add_widget(self.img)
+        
+        # Botão para selecionar a moldura
+        btn = Button(
+            text="SELECIONAR",
+            font_size='20sp',
+            size_hint_y=0.2,
+            background_color=(0.2, 0.6, 0.8, 1)
+        )
+        btn.bind(on_release=self.selecionar_moldura)
+        self.add_widget(btn)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Atualiza o item reaproveitado com os dados de outra moldura"""
+        self.img.source = data['miniatura']
+        return super(TileMoldura, self).refresh_view_attrs(rv, index, data)
+
+    def selecionar_moldura(self, instance):
+        """Callback para quando uma moldura é selecionada"""
+        self.tela.manager.selecionar_moldura(self.moldura_path)
 
 
 class FrameSelectScreen(Screen):
@@ -387,14 +755,30 @@ class FrameSelectScreen(Screen):
         )
         self.layout.add_widget(self.titulo)
         
-        # Área de molduras com scroll
-        self.scroll_view = ScrollView(size_hint=(1, 0.75))
-        self.molduras_grid = GridLayout(cols=3, spacing=20, size_hint_y=None, padding=20)
-        # É necessário definir a altura do grid para o scroll funcionar
-        self.molduras_grid.bind(minimum_height=self.molduras_grid.setter('height'))
+        # Galeria virtualizada: só existem widgets para as linhas visíveis
+        self.area_molduras = FloatLayout(size_hint=(1, 0.75))
+        self.galeria = RecycleView(viewclass=TileMoldura)
+        grade = RecycleGridLayout(
+            cols=3,
+            spacing=20,
+            padding=20,
+            default_size=(None, 300),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        # É necessário definir a altura da grade para o scroll funcionar
+        grade.bind(minimum_height=grade.setter('height'))
+        self.galeria.add_widget(grade)
+        self.area_molduras.add_widget(self.galeria)
         
-        self.scroll_view.add_widget(self.molduras_grid)
-        self.layout.add_widget(self.scroll_view)
+        # Mensagem exibida quando não há molduras (inicialmente invisível)
+        self.lbl_sem_molduras = Label(
+            text="Nenhuma moldura encontrada.\nAdicione arquivos PNG ou JSON na pasta 'molduras'.",
+            font_size='30sp',
+            opacity=0
+        )
+        self.area_molduras.add_widget(self.lbl_sem_molduras)
+        self.layout.add_widget(self.area_molduras)
         
         # Botão para voltar à tela inicial
         self.btn_voltar = Button(
@@ -410,72 +794,134 @@ class FrameSelectScreen(Screen):
         self.add_widget(self.layout)
 
     def carregar_lista_molduras(self):
-        """Carrega e exibe as molduras disponíveis"""
-        # Limpa a grade existente
-        self.molduras_grid.clear_widgets()
-        
-        # Carrega as molduras da pasta
+        """Carrega a lista de molduras disponíveis na galeria"""
         app = App.get_running_app()
         molduras = app.carregar_molduras()
         
-        if not molduras:
-            # Se não encontrar molduras, exibe mensagem
-            lbl_sem_molduras = Label(
-                text="Nenhuma moldura encontrada.\nAdicione arquivos PNG na pasta 'molduras'.",
-                font_size='30sp',
-                size_hint_y=None,
-                height=200
-            )
-            self.molduras_grid.add_widget(lbl_sem_molduras)
-        else:
-            # Exibe as molduras encontradas
-            for moldura_path in molduras:
-                # Container para a moldura
-                box = BoxLayout(
-                    orientation='vertical',
-                    size_hint_y=None,
-                    height=300,
-                    spacing=10
-                )
-                
-                # Imagem da moldura
-                img = KivyImage(source=moldura_path, allow_stretch=True, keep_ratio=True)
-                
-                # Botão para selecionar a moldura
-                btn = Button(
-                    text="SELECIONAR",
-                    font_size='20sp',
-                    size_hint_y=0.2,
-                    background_color=(0.2, 0.6, 0.8, 1)
+        # Se não encontrar molduras, exibe mensagem
+        self.lbl_sem_molduras.opacity = 0 if molduras else 1
+        
+        # Apenas os dados são recriados; os widgets são reaproveitados pelo RecycleView
+        dados = []
+        for moldura_path in molduras:
+            miniatura = app.cache_miniaturas.obter(moldura_path)
+            if miniatura is None:
+                # Ainda não gerada: exibe quando a geração em segundo plano terminar
+                futuro = app.cache_miniaturas.gerar(moldura_path)
+                futuro.add_done_callback(
+                    lambda f, caminho=moldura_path: Clock.schedule_once(
+                        lambda dt: self.mostrar_miniatura(caminho, f)
+                    )
                 )
-                # Salva o caminho da moldura como propriedade do botão
-                btn.moldura_path = moldura_path
-                btn.bind(on_release=self.selecionar_moldura)
-                
-                # Adiciona imagem e botão ao container
-                box.add_widget(img)
-                box.add_widget(btn)
-                
-                # Adiciona o container à grade
-                self.molduras_grid.add_widget(box)
+            dados.append({'moldura_path': moldura_path, 'miniatura': miniatura or '', 'tela': self})
+        self.galeria.data = dados
 
-    def selecionar_moldura(self, instance):
-        """Callback para quando uma moldura é selecionada"""
-        app = App.get_running_app()
-        app.selecionar_moldura(instance.moldura_path)
+    def mostrar_miniatura(self, moldura_path, futuro):
+        """Exibe a miniatura recém-gerada (chamado na thread da interface)"""
+        try:
+            miniatura = futuro.result()
+        except Exception as e:
+            print(f"[ERRO] Falha ao gerar miniatura: {e}")
+            return
+        
+        for item in self.galeria.data:
+            if item['moldura_path'] == moldura_path:
+                item['miniatura'] = miniatura
+                self.galeria.refresh_from_data()
+                break
 
     def voltar_inicio(self, instance):
         """Retorna para a tela inicial"""
-        app = App.get_running_app()
-        app.sm.current = 'welcome'
+        self.manager.current = 'welcome'
+
+
+class PreviewComMoldura(Widget):
+    """Feed da câmera dentro da janela da moldura, com a moldura desenhada por cima
+
+    A moldura é enviada uma única vez como textura e a mescla é feita pela GPU; a cada
+    frame só a textura da câmera muda. A janela e o recorte da foto seguem a mesma
+    geometria da composição final (render.SobreposicaoPreview e composicao.compor).
+    """
+
+    def __init__(self, **kwargs):
+        super(PreviewComMoldura, self).__init__(**kwargs)
+        self.sobreposicao = None
+        self.tamanho_camera = None
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.retangulo_camera = Rectangle()
+            self.retangulo_moldura = Rectangle()
+        self.bind(pos=self.atualizar_geometria, size=self.atualizar_geometria)
+
+    def definir_moldura(self, sobreposicao):
+        """Envia a camada da moldura para a GPU (uma vez por moldura selecionada)"""
+        altura, largura = sobreposicao.rgba.shape[:2]
+        textura = Texture.create(size=(largura, altura), colorfmt='rgba')
+        textura.flip_vertical()  # o array começa pela linha de cima, o Kivy pela de baixo
+        textura.blit_buffer(sobreposicao.rgba.reshape(-1), colorfmt='rgba', bufferfmt='ubyte')
+        self.sobreposicao = sobreposicao
+        self.retangulo_moldura.texture = textura
+        self.atualizar_geometria()
+
+    def limpar(self):
+        """Remove a moldura e o feed (nada é desenhado até a próxima moldura)"""
+        self.sobreposicao = None
+        self.retangulo_moldura.texture = None
+        self.retangulo_camera.texture = None
+        self.tamanho_camera = None
+        self.atualizar_geometria()
+
+    def atualizar_camera(self, textura):
+        """Troca a textura da câmera ou apenas redesenha quando ela é a mesma"""
+        if self.retangulo_camera.texture is textura and self.tamanho_camera == textura.size:
+            self.canvas.ask_update()
+            return
+        self.retangulo_camera.texture = textura
+        self.tamanho_camera = textura.size
+        self.atualizar_geometria()
+
+    def atualizar_geometria(self, *args):
+        """Posiciona a moldura (cabendo no widget) e a câmera recortada na janela dela"""
+        if self.sobreposicao is None:
+            self.retangulo_moldura.size = (0, 0)
+            self.retangulo_camera.size = (0, 0)
+            return
+
+        from composicao import recorte_cobrir  # já carregado pelo aquecimento
+        largura_moldura, altura_moldura = self.sobreposicao.tamanho_moldura
+        escala = min(self.width / largura_moldura, self.height / altura_moldura)
+        mx = self.x + (self.width - largura_moldura * escala) / 2.0
+        my = self.y + (self.height - altura_moldura * escala) / 2.0
+        self.retangulo_moldura.pos = (mx, my)
+        self.retangulo_moldura.size = (largura_moldura * escala, altura_moldura * escala)
+
+        # Janela em pixels de impressão (origem no topo) convertida para a tela (origem embaixo)
+        jx, jy, jlargura, jaltura = self.sobreposicao.janela
+        self.retangulo_camera.pos = (mx + jx * escala, my + (altura_moldura - jy - jaltura) * escala)
+        self.retangulo_camera.size = (jlargura * escala, jaltura * escala)
+
+        if self.tamanho_camera is None:
+            return
+        # Mesmo recorte central da composição, invertido na vertical e espelhado nas coordenadas
+        largura_camera, altura_camera = self.tamanho_camera
+        rx, ry, rlargura, raltura = recorte_cobrir(largura_camera, altura_camera, jlargura, jaltura)
+        u0, u1 = rx / largura_camera, (rx + rlargura) / largura_camera
+        v_topo, v_base = ry / altura_camera, (ry + raltura) / altura_camera
+        self.retangulo_camera.tex_coords = (u1, v_base, u0, v_base, u0, v_topo, u1, v_topo)
 
 
 class CaptureScreen(Screen):
     def __init__(self, **kwargs):
         super(CaptureScreen, self).__init__(**kwargs)
-        self.camera = None
+        self.captura = None
+        self.textura_preview = None
+        self.filtro = None
         self.contagem_ativa = False
+        self.instante_disparo = None
+        self.fim_contagem = None
         self.countdown_value = COUNTDOWN_TIME
+        self.total_fotos = 1
+        self.indice_foto = 0
         
         # Layout principal
         self.layout = FloatLayout()
@@ -484,17 +930,32 @@ class CaptureScreen(Screen):
         self.camera_widget = KivyImage(allow_stretch=True, keep_ratio=False)
         self.layout.add_widget(self.camera_widget)
         
+        # Feed da câmera já dentro da moldura selecionada (PREVIEW_COM_MOLDURA)
+        self.preview_moldura = PreviewComMoldura(opacity=0)
+        self.layout.add_widget(self.preview_moldura)
+        
         # Botão para tirar foto
         self.btn_tirar_foto = Button(
             text="TIRAR FOTO",
             font_size='40sp',
-            size_hint=(0.5, 0.15),
-            pos_hint={'center_x': 0.5, 'y': 0.05},
+            size_hint=(0.4, 0.15),
+            pos_hint={'center_x': 0.3, 'y': 0.05},
             background_color=(0.2, 0.7, 0.3, 1)
         )
         self.btn_tirar_foto.bind(on_release=self.on_tirar_foto)
         self.layout.add_widget(self.btn_tirar_foto)
         
+        # Botão para o modo tirinha (várias fotos seguidas)
+        self.btn_tirinha = Button(
+            text=f"TIRINHA ({TIRINHA['fotos']} FOTOS)",
+            font_size='40sp',
+            size_hint=(0.4, 0.15),
+            pos_hint={'center_x': 0.7, 'y': 0.05},
+            background_color=(0.2, 0.6, 0.8, 1)
+        )
+        self.btn_tirinha.bind(on_release=self.on_tirinha)
+        self.layout.add_widget(self.btn_tirinha)
+        
         # Label para a contagem regressiva (inicialmente invisível)
         self.lbl_contagem = Label(
             text="",
@@ -505,6 +966,17 @@ class CaptureScreen(Screen):
         )
         self.layout.add_widget(self.lbl_contagem)
         
+        # Label com o número da foto no modo tirinha (inicialmente invisível)
+        self.lbl_sequencia = Label(
+            text="",
+            font_size='40sp',
+            bold=True,
+            size_hint=(0.4, 0.1),
+            pos_hint={'right': 0.95, 'top': 0.95},
+            opacity=0
+        )
+        self.layout.add_widget(self.lbl_sequencia)
+        
         # Botão para voltar à seleção de molduras
         self.btn_voltar = Button(
             text="VOLTAR",
@@ -516,27 +988,70 @@ class CaptureScreen(Screen):
         self.btn_voltar.bind(on_release=self.voltar_selecao)
         self.layout.add_widget(self.btn_voltar)
         
+        # Botão que troca o filtro de cor (aplicado ao preview e à foto)
+        self.btn_filtro = Button(
+            text="FILTRO: NENHUM",
+            font_size='25sp',
+            size_hint=(0.3, 0.1),
+            pos_hint={'center_x': 0.5, 'top': 0.95},
+            background_color=(0.5, 0.3, 0.7, 1),
+            opacity=1 if FILTROS else 0,
+            disabled=not FILTROS
+        )
+        self.btn_filtro.bind(on_release=lambda instance: self.manager.proximo_filtro())
+        self.layout.add_widget(self.btn_filtro)
+        
         self.add_widget(self.layout)
 
+    def mostrar_filtro(self, identificador):
+        """Atualiza o botão e o filtro aplicado ao preview ao vivo"""
+        from filtros import nome_filtro, obter_filtro  # já carregado pelo aquecimento
+        self.filtro = obter_filtro(identificador)
+        self.btn_filtro.text = f"FILTRO: {nome_filtro(identificador)}"
+
+    def preparar_sobreposicao(self, moldura_path):
+        """Prepara em segundo plano a camada da moldura no tamanho da área da estação"""
+        app = App.get_running_app()
+        self.mostrar_sobreposicao(None)
+        limite = (max(1, int(self.manager.width)), max(1, int(self.manager.height)))
+        futuro = app.executor_render.submeter_sobreposicao(moldura_path, limite)
+        futuro.add_done_callback(
+            lambda f: Clock.schedule_once(lambda dt: self.sobreposicao_pronta(f, moldura_path))
+        )
+
+    def sobreposicao_pronta(self, futuro, moldura_path):
+        """Envia a camada para a GPU se a moldura ainda for a selecionada (thread da interface)"""
+        if moldura_path != self.manager.moldura_selecionada:
+            return
+        try:
+            sobreposicao = futuro.result()
+        except Exception as e:
+            print(f"[AVISO] Preview sem moldura: falha ao preparar a camada da moldura: {e}")
+            return
+        self.mostrar_sobreposicao(sobreposicao)
+
+    def mostrar_sobreposicao(self, sobreposicao):
+        """Alterna entre o feed com a moldura por cima e o feed da câmera na tela inteira"""
+        if sobreposicao is None:
+            self.preview_moldura.limpar()
+            self.preview_moldura.opacity = 0
+            self.camera_widget.opacity = 1
+            return
+        self.preview_moldura.definir_moldura(sobreposicao)
+        if self.textura_preview is not None:
+            self.preview_moldura.atualizar_camera(self.textura_preview)
+        self.preview_moldura.opacity = 1
+        self.camera_widget.opacity = 0
+
     def setup_camera(self):
-        """Configura e inicia a câmera"""
+        """Retoma a leitura da câmera (aberta uma única vez no início do aplicativo)"""
         try:
-            # Libera a câmera se já estiver em uso
-            if self.camera is not None:
-                self.camera.release()
-            
-            # Inicializa a câmera
-            self.camera = cv2.VideoCapture(CAMERA_ID, cv2.CAP_DSHOW)  # CAP_DSHOW para melhor compatibilidade no Windows
+            # Para a atualização anterior se já estiver em uso
+            self.parar_camera()
             
-            if not self.camera.isOpened():
-                print("[ERRO] Não foi possível abrir a câmera.")
-                return False
-            
-            # Define resolução da câmera
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_RESOLUTION[0])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_RESOLUTION[1])
-            
-            print(f"[INFO] Câmera inicializada com resolução {CAMERA_RESOLUTION}")
+            # A thread de captura volta a ler os frames continuamente
+            self.captura = self.manager.captura
+            self.captura.retomar()
             
             # Inicia a atualização da imagem
             Clock.schedule_interval(self.update_camera, 1.0/30.0)  # 30 FPS
@@ -546,35 +1061,76 @@ class CaptureScreen(Screen):
             print(f"[ERRO] Falha ao configurar câmera: {e}")
             return False
 
+    def parar_camera(self):
+        """Para a atualização do preview e pausa a leitura da câmera (sem liberá-la)"""
+        Clock.unschedule(self.update_camera)
+        if self.captura is not None:
+            self.captura.pausar()
+            self.captura = None
+
     def update_camera(self, dt):
-        """Atualiza o feed da câmera"""
-        if self.camera is None or not self.camera.isOpened():
+        """Atualiza o feed da câmera com o frame mais recente da thread de captura"""
+        if self.captura is None:
             return
         
-        ret, frame = self.camera.read()
-        if ret:
-            # Converte o frame para textura do Kivy
-            buf = cv2.flip(frame, 0)  # 0 = flip vertical
-            buf = cv2.flip(buf, 1)    # 1 = flip horizontal (efeito espelho)
-            texture = Texture.create(size=(frame.shape[1], frame.shape[0]), colorfmt='bgr')
-            texture.blit_buffer(buf.tobytes(), colorfmt='bgr', bufferfmt='ubyte')
-            self.camera_widget.texture = texture
+        item = self.captura.ultimo_frame(somente_novo=True)
+        if item is None:
+            return
+        
+        with App.get_running_app().metricas.cronometrar('preview_camera'):
+            frame = item[2]
+            altura, largura = frame.shape[:2]
+            if self.filtro is not None:
+                # Mesma tabela da foto final, com a consulta rápida (vizinho mais próximo)
+                frame = self.filtro.aplicar(frame, rapido=True)
             
-            # Salva o último frame capturado
-            self.ultimo_frame = frame
+            # Uma única textura por resolução da câmera, reaproveitada a cada frame.
+            # A inversão vertical e o espelhamento são feitos nas coordenadas da textura (GPU)
+            texture = self.textura_preview
+            if texture is None or texture.size != (largura, altura):
+                texture = Texture.create(size=(largura, altura), colorfmt='bgr')
+                texture.flip_vertical()    # OpenCV começa pela linha de cima, o Kivy pela de baixo
+                texture.flip_horizontal()  # efeito espelho
+                self.textura_preview = texture
+            
+            # Envia o array do frame direto, sem criar uma cópia em bytes
+            texture.blit_buffer(frame.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+            if self.preview_moldura.sobreposicao is not None:
+                # A moldura já está na GPU: só a camada da câmera é redesenhada
+                self.preview_moldura.atualizar_camera(texture)
+            elif self.camera_widget.texture is texture:
+                self.camera_widget.canvas.ask_update()
+            else:
+                self.camera_widget.texture = texture
 
     def on_tirar_foto(self, instance):
         """Chamado quando o botão de tirar foto é pressionado"""
         if not self.contagem_ativa:
             self.iniciar_contagem()
 
-    def iniciar_contagem(self):
-        """Inicia a contagem regressiva para tirar a foto"""
+    def on_tirinha(self, instance):
+        """Chamado quando o botão do modo tirinha é pressionado"""
+        if not self.contagem_ativa:
+            self.iniciar_contagem(TIRINHA['fotos'])
+
+    def iniciar_contagem(self, total_fotos=1):
+        """Inicia a contagem regressiva para tirar a foto (ou a sequência de fotos)"""
         self.contagem_ativa = True
-        self.countdown_value = COUNTDOWN_TIME
+        self.total_fotos = total_fotos
+        self.indice_foto = 0
         self.btn_tirar_foto.disabled = True
+        self.btn_tirinha.disabled = True
         self.btn_voltar.disabled = True
+        self.btn_filtro.disabled = True
         self.lbl_contagem.opacity = 1
+        self.proxima_contagem()
+
+    def proxima_contagem(self):
+        """Reinicia a contagem para a próxima foto da sequência"""
+        self.countdown_value = COUNTDOWN_TIME
+        if self.total_fotos > 1:
+            self.lbl_sequencia.text = f"FOTO {self.indice_foto + 1} DE {self.total_fotos}"
+            self.lbl_sequencia.opacity = 1
         self.atualizar_contagem()
 
     def atualizar_contagem(self):
@@ -582,53 +1138,77 @@ class CaptureScreen(Screen):
         if self.countdown_value > 0:
             # Ainda está contando
             self.lbl_contagem.text = str(self.countdown_value)
+            if self.countdown_value == 1 and self.captura is not None:
+                # Último segundo: a câmera já passa para a resolução da foto
+                self.captura.usar_modo_foto()
             self.countdown_value -= 1
             Clock.schedule_once(lambda dt: self.atualizar_contagem(), 1)
         else:
             # Fim da contagem, captura a foto
             self.lbl_contagem.text = "SORRIA!"
+            # Guarda o instante do disparo para escolher o frame mais próximo dele
+            self.fim_contagem = time.monotonic()
+            self.instante_disparo = self.fim_contagem + 0.5
             Clock.schedule_once(lambda dt: self.capturar_foto(), 0.5)
 
     def capturar_foto(self):
         """Captura a foto após a contagem regressiva"""
-        if hasattr(self, 'ultimo_frame'):
-            # Pausa a atualização da câmera
-            Clock.unschedule(self.update_camera)
-            
-            # Processa a foto
-            app = App.get_running_app()
-            app.processar_e_mostrar_foto(self.ultimo_frame.copy())
-            
-            # Reativa os botões e redefine estados
-            self.contagem_ativa = False
-            self.btn_tirar_foto.disabled = False
-            self.btn_voltar.disabled = False
-            self.lbl_contagem.opacity = 0
-        else:
+        item = None
+        if self.captura is not None:
+            item = self.captura.frame_mais_proximo(
+                self.instante_disparo or time.monotonic(), self.captura.resolucao
+            )
+            self.captura.usar_modo_preview()
+        
+        if item is None:
             print("[ERRO] Nenhum frame disponível para captura")
-            self.contagem_ativa = False
-            self.btn_tirar_foto.disabled = False
-            self.btn_voltar.disabled = False
-            self.lbl_contagem.opacity = 0
+            self.finalizar_contagem()
+            return
+        
+        # Intervalo entre o fim da contagem e a captura efetiva da foto
+        app = App.get_running_app()
+        if self.fim_contagem is not None:
+            app.metricas.registrar('contagem_ate_captura', time.monotonic() - self.fim_contagem)
+        
+        # Processa a foto (a thread de captura nunca reaproveita o array do frame)
+        if self.total_fotos == 1:
+            # Pausa a câmera enquanto a foto é processada
+            self.parar_camera()
+            self.manager.processar_e_mostrar_foto(item[2])
+            self.finalizar_contagem()
+            return
+        
+        # Modo tirinha: a foto vai para composição enquanto a próxima contagem começa
+        self.manager.adicionar_foto_tirinha(item[2], self.indice_foto, self.total_fotos)
+        self.indice_foto += 1
+        if self.indice_foto < self.total_fotos:
+            self.proxima_contagem()
+        else:
+            self.parar_camera()
+            self.finalizar_contagem()
+
+    def finalizar_contagem(self):
+        """Reativa os botões e redefine os estados da contagem"""
+        self.contagem_ativa = False
+        self.btn_tirar_foto.disabled = False
+        self.btn_tirinha.disabled = False
+        self.btn_voltar.disabled = False
+        self.btn_filtro.disabled = not FILTROS
+        self.lbl_contagem.opacity = 0
+        self.lbl_sequencia.opacity = 0
 
     def voltar_selecao(self, instance):
         """Volta para a tela de seleção de molduras"""
-        # Para a atualização da câmera
-        Clock.unschedule(self.update_camera)
-        
-        # Libera a câmera
-        if self.camera is not None:
-            self.camera.release()
-            self.camera = None
+        # Para a atualização e pausa a câmera
+        self.parar_camera()
         
         # Volta para a tela de seleção
-        app = App.get_running_app()
-        app.sm.current = 'frame_select'
+        self.manager.current = 'frame_select'
 
     def on_leave(self):
         """Chamado quando sai desta tela"""
-        # Para a atualização da câmera quando sair da tela
-        Clock.unschedule(self.update_camera)
+        # Para a atualização e pausa a câmera quando sair da tela
+        self.parar_camera()
 
 
 class PreviewScreen(Screen):
@@ -653,12 +1233,39 @@ class PreviewScreen(Screen):
         
         self.add_widget(self.layout)
 
-    def mostrar_foto(self, imagem_pil):
+    def mostrar_processando(self):
+        """Mostra o estado de processamento enquanto a foto é composta"""
+        self.preview_image.texture = None
+        self.lbl_info.text = "PROCESSANDO..."
+
+    def mostrar_erro(self):
+        """Informa que a foto não pôde ser processada"""
+        self.lbl_info.text = "ERRO AO PROCESSAR A FOTO"
+
+    def mostrar_status_impressao(self, trabalho):
+        """Atualiza a mensagem de acordo com o estado do trabalho de impressão"""
+        from impressao import PENDENTE, IMPRIMINDO, CONCLUIDO, FALHOU  # já carregado pelo aquecimento
+        mensagens = {
+            PENDENTE: "NA FILA DE IMPRESSÃO...",
+            IMPRIMINDO: "IMPRIMINDO...",
+            CONCLUIDO: "IMPRESSO!",
+            FALHOU: "FALHA NA IMPRESSÃO",
+        }
+        if trabalho['status'] == PENDENTE and trabalho['erro']:
+            self.lbl_info.text = "IMPRESSORA OCUPADA, TENTANDO NOVAMENTE..."
+        else:
+            self.lbl_info.text = mensagens.get(trabalho['status'], "")
+
+    def mostrar_foto(self, imagem_bgr):
         """Exibe a foto processada na tela"""
-        # Converte a imagem PIL para uma textura Kivy
-        data = imagem_pil.tobytes()
-        texture = Texture.create(size=imagem_pil.size, colorfmt='rgb')
-        texture.blit_buffer(data, colorfmt='rgb', bufferfmt='ubyte')
+        self.lbl_info.text = "IMPRIMINDO..."
+        
+        # Converte o array BGR para uma textura Kivy
+        altura, largura = imagem_bgr.shape[:2]
+        texture = Texture.create(size=(largura, altura), colorfmt='bgr')
+        texture.blit_buffer(imagem_bgr.tobytes(), colorfmt='bgr', bufferfmt='ubyte')
+        # A textura do Kivy começa pela linha de baixo; inverte na GPU
+        texture.flip_vertical()
         
         # Atualiza a imagem na tela
         self.preview_image.texture = texture
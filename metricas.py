@@ -0,0 +1,163 @@
+"""
+Métricas de desempenho da cabine fotográfica
+Registra a duração de cada etapa (abertura da câmera, preview, contagem até a
+captura, composição, textura, gravação e impressão) e contadores (frames
+descartados, falhas de impressão). Uma thread exporta periodicamente um resumo em
+arquivos JSON-lines rotativos e um arquivo de texto no formato do Prometheus
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Limites (em segundos) dos buckets do histograma exportado para o Prometheus
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metricas:
+    def __init__(self, diretorio='metricas', intervalo=15.0, tamanho_maximo_mb=5, arquivos_mantidos=5):
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self.tamanho_maximo = tamanho_maximo_mb * 1024 * 1024
+        self.arquivos_mantidos = arquivos_mantidos
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Acumulado desde o início (Prometheus): etapa -> [quantidade, soma, contagem por bucket]
+        self._histogramas = {}
+        # Durações da janela atual (JSON-lines), descartadas a cada exportação
+        self._janela = {}
+        self._contadores = {}
+        self._thread = None
+        self._parar = threading.Event()
+
+    @contextmanager
+    def cronometrar(self, etapa):
+        """Mede a duração do bloco e registra na etapa informada"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def registrar(self, etapa, segundos):
+        """Registra a duração (em segundos) de uma execução da etapa"""
+        segundos = max(0.0, segundos)
+        with self._lock:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = [0, 0.0, [0] * len(BUCKETS)]
+                self._janela[etapa] = deque(maxlen=10000)
+            histograma[0] += 1
+            histograma[1] += segundos
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    histograma[2][i] += 1
+            self._janela[etapa].append(segundos)
+
+    def incrementar(self, contador, quantidade=1):
+        """Soma a quantidade ao contador"""
+        if quantidade:
+            with self._lock:
+                self._contadores[contador] = self._contadores.get(contador, 0) + quantidade
+
+    def iniciar(self):
+        """Inicia a thread de exportação periódica"""
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name='metricas', daemon=True)
+        self._thread.start()
+
+    def encerrar(self):
+        """Para a thread de exportação e grava o último resumo"""
+        if self._thread is not None:
+            self._parar.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.exportar()
+
+    def exportar(self):
+        """Grava o resumo da janela atual no JSON-lines e reescreve o arquivo do Prometheus"""
+        with self._lock:
+            janela = {etapa: list(duracoes) for etapa, duracoes in self._janela.items() if duracoes}
+            for duracoes in self._janela.values():
+                duracoes.clear()
+            histogramas = {etapa: (h[0], h[1], list(h[2])) for etapa, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        try:
+            self._gravar_jsonl(janela, contadores)
+            self._gravar_prometheus(histogramas, contadores)
+        except OSError as e:
+            print(f"[ERRO] Falha ao exportar métricas: {e}")
+
+    def _executar(self):
+        """Laço da thread: exporta as métricas a cada intervalo"""
+        while not self._parar.wait(self.intervalo):
+            self.exportar()
+
+    def _gravar_jsonl(self, janela, contadores):
+        """Acrescenta uma linha com o resumo da janela, rotacionando o arquivo quando fica grande"""
+        destino = os.path.join(self.diretorio, 'metricas.jsonl')
+        if os.path.exists(destino) and os.path.getsize(destino) >= self.tamanho_maximo:
+            self._rotacionar(destino)
+
+        linha = {
+            'instante': datetime.now().isoformat(timespec='seconds'),
+            'etapas': {etapa: _resumir(duracoes) for etapa, duracoes in janela.items()},
+            'contadores': contadores,
+        }
+        with open(destino, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+
+    def _rotacionar(self, destino):
+        """metricas.jsonl -> metricas.1.jsonl -> metricas.2.jsonl ... (apaga o mais antigo)"""
+        base = destino[:-len('.jsonl')]
+        for i in range(self.arquivos_mantidos - 1, 0, -1):
+            anterior = f"{base}.{i}.jsonl"
+            if os.path.exists(anterior):
+                os.replace(anterior, f"{base}.{i + 1}.jsonl")
+        os.replace(destino, f"{base}.1.jsonl")
+        excedente = f"{base}.{self.arquivos_mantidos + 1}.jsonl"
+        if os.path.exists(excedente):
+            os.remove(excedente)
+
+    def _gravar_prometheus(self, histogramas, contadores):
+        """Reescreve o arquivo de texto do Prometheus de forma atômica (coletor textfile)"""
+        linhas = [
+            "# HELP cabine_etapa_duracao_segundos Duração das etapas da cabine fotográfica",
+            "# TYPE cabine_etapa_duracao_segundos histogram",
+        ]
+        for etapa, (quantidade, soma, buckets) in sorted(histogramas.items()):
+            for limite, acumulado in zip(BUCKETS, buckets):
+                linhas.append(f'cabine_etapa_duracao_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+            linhas.append(f'cabine_etapa_duracao_segundos_bucket{{etapa="{etapa}",le="+Inf"}} {quantidade}')
+            linhas.append(f'cabine_etapa_duracao_segundos_sum{{etapa="{etapa}"}} {soma:.6f}')
+            linhas.append(f'cabine_etapa_duracao_segundos_count{{etapa="{etapa}"}} {quantidade}')
+        for contador, valor in sorted(contadores.items()):
+            linhas.append(f"# TYPE cabine_{contador}_total counter")
+            linhas.append(f"cabine_{contador}_total {valor}")
+
+        destino = os.path.join(self.diretorio, 'cabine.prom')
+        temporario = destino + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(linhas) + '\n')
+        os.replace(temporario, destino)
+
+
+def _resumir(duracoes):
+    """Quantidade, média, p50, p95 e máximo (em ms) das durações da janela"""
+    ordenadas = sorted(duracoes)
+    quantidade = len(ordenadas)
+    return {
+        'quantidade': quantidade,
+        'media_ms': round(sum(ordenadas) / quantidade * 1000, 3),
+        'p50_ms': round(ordenadas[int(0.50 * (quantidade - 1))] * 1000, 3),
+        'p95_ms': round(ordenadas[int(0.95 * (quantidade - 1))] * 1000, 3),
+        'max_ms': round(ordenadas[-1] * 1000, 3),
+    }
@@ -0,0 +1,89 @@
+"""
+Cache em disco das miniaturas das molduras
+As miniaturas são geradas em segundo plano na primeira vez que uma moldura aparece
+e ficam salvas em uma pasta, identificadas pelo caminho, data de modificação e
+tamanho; a galeria carrega apenas esses arquivos pequenos
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from molduras_procedurais import carregar_especificacao, e_especificacao, renderizar_moldura
+
+
+class CacheMiniaturas:
+    def __init__(self, diretorio='cache_miniaturas', tamanho=(300, 300)):
+        self.diretorio = diretorio
+        self.tamanho = tuple(tamanho)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        # Uma única thread de geração, para não competir com a interface e a câmera
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='miniaturas')
+        self._pendentes = {}
+        self._lock = threading.Lock()
+
+    def caminho_miniatura(self, caminho):
+        """Retorna o caminho da miniatura no cache (chave: caminho + mtime + tamanho)"""
+        caminho = os.path.abspath(caminho)
+        mtime = os.stat(caminho).st_mtime_ns
+        chave = f"{caminho}|{mtime}|{self.tamanho[0]}x{self.tamanho[1]}"
+        nome = hashlib.sha1(chave.encode('utf-8')).hexdigest() + '.png'
+        return os.path.join(self.diretorio, nome)
+
+    def obter(self, caminho):
+        """Retorna o caminho da miniatura se ela já estiver no cache, senão None"""
+        destino = self.caminho_miniatura(caminho)
+        return destino if os.path.exists(destino) else None
+
+    def gerar(self, caminho):
+        """Agenda a geração da miniatura e retorna um Future com o caminho dela"""
+        destino = self.caminho_miniatura(caminho)
+        novo = False
+        with self._lock:
+            futuro = self._pendentes.get(destino)
+            if futuro is None:
+                futuro = self._executor.submit(self._gerar, caminho, destino)
+                self._pendentes[destino] = futuro
+                novo = True
+        # Fora do lock: se o Future já terminou, o callback roda aqui mesmo e pega o lock
+        if novo:
+            futuro.add_done_callback(lambda f: self._concluir(destino))
+        return futuro
+
+    def gerar_faltantes(self, caminhos):
+        """Agenda a geração de todas as miniaturas que ainda não estão no cache"""
+        for caminho in caminhos:
+            if self.obter(caminho) is None:
+                self.gerar(caminho)
+
+    def encerrar(self):
+        """Encerra a thread de geração descartando o que ainda não começou"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _concluir(self, destino):
+        with self._lock:
+            self._pendentes.pop(destino, None)
+
+    def _gerar(self, caminho, destino):
+        """Decodifica a moldura, reduz para o tamanho da miniatura e salva de forma atômica"""
+        if os.path.exists(destino):
+            return destino
+
+        if e_especificacao(caminho):
+            # Moldura em JSON: desenhada direto no tamanho da miniatura
+            miniatura = renderizar_moldura(carregar_especificacao(caminho), self.tamanho, exato=False)
+        else:
+            with Image.open(caminho) as imagem:
+                imagem.thumbnail(self.tamanho, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                miniatura = imagem.convert("RGBA")
+
+        # Grava em um arquivo temporário e renomeia, para a galeria nunca ler um arquivo pela metade
+        temporario = f"{destino}.{threading.get_ident()}.tmp"
+        miniatura.save(temporario, "PNG")
+        os.replace(temporario, destino)
+        print(f"[INFO] Miniatura gerada para {caminho}")
+        return destino
@@ -0,0 +1,239 @@
+"""
+Molduras procedurais da cabine fotográfica
+Uma moldura pode ser descrita em um arquivo JSON (bordas, retângulos, círculos,
+estrelas e texto) em vez de um PNG grande. A especificação é desenhada sob demanda
+exatamente na resolução pedida (impressão, preview ou miniatura), com operações
+vetorizadas do NumPy/OpenCV, e identificada pelo conteúdo (hash), não pelo arquivo
+
+Exemplo de especificação (medidas em pixels do tamanho de referência):
+    {
+      "tamanho": [2480, 3508],
+      "elementos": [
+        {"tipo": "contorno", "largura": 100, "cor": [255, 0, 0, 255]},
+        {"tipo": "retangulo", "caixa": [100, 2882, 2380, 3408], "cor": [0, 255, 0, 180]},
+        {"tipo": "elipse", "caixa": [40, 40, 160, 160], "cor": [0, 0, 255, 255]},
+        {"tipo": "estrelas", "quantidade": 12, "raio_orbita": 1240, "tamanho": 120, "cor": [255, 0, 255, 255]},
+        {"tipo": "texto", "texto": "CABINE", "centro": [1240, 3145], "tamanho_fonte": 120,
+         "cor": [255, 255, 255, 255]}
+      ]
+    }
+"""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Muda quando o desenho muda, para não reaproveitar renderizações antigas
+VERSAO_RENDERIZADOR = 2
+
+TIPOS_ELEMENTO = ('contorno', 'retangulo', 'elipse', 'estrelas', 'texto')
+
+
+def e_especificacao(caminho):
+    """Indica se o arquivo de moldura é uma especificação JSON"""
+    return caminho.lower().endswith('.json')
+
+
+def carregar_especificacao(caminho):
+    """Lê e valida a especificação de uma moldura"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        especificacao = json.load(f)
+
+    tamanho = especificacao.get('tamanho')
+    if not isinstance(tamanho, list) or len(tamanho) != 2 or min(tamanho) <= 0:
+        raise ValueError(f"Moldura {caminho}: 'tamanho' deve ser [largura, altura]")
+    for elemento in especificacao.get('elementos', []):
+        if elemento.get('tipo') not in TIPOS_ELEMENTO:
+            raise ValueError(f"Moldura {caminho}: tipo de elemento inválido {elemento.get('tipo')!r}")
+    return especificacao
+
+
+def chave_conteudo(especificacao):
+    """Identificador da moldura pelo conteúdo da especificação"""
+    texto = json.dumps(especificacao, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(f"{VERSAO_RENDERIZADOR}|{texto}".encode('utf-8')).hexdigest()
+
+
+def tamanho_renderizado(especificacao, tamanho=None, exato=True):
+    """Tamanho final da moldura: o pedido (exato), o que cabe nele ou o de referência"""
+    largura, altura = especificacao['tamanho']
+    if tamanho is None:
+        return (largura, altura)
+    if exato:
+        return (int(tamanho[0]), int(tamanho[1]))
+    ratio = min(tamanho[0] / largura, tamanho[1] / altura)
+    return (max(1, int(largura * ratio)), max(1, int(altura * ratio)))
+
+
+def renderizar_moldura(especificacao, tamanho=None, exato=True):
+    """Desenha a moldura (imagem PIL RGBA) direto no tamanho pedido"""
+    largura, altura = tamanho_renderizado(especificacao, tamanho, exato)
+    escala_x = largura / especificacao['tamanho'][0]
+    escala_y = altura / especificacao['tamanho'][1]
+
+    imagem = np.zeros((altura, largura, 4), dtype=np.uint8)
+    for elemento in especificacao.get('elementos', []):
+        desenhar = _DESENHOS[elemento['tipo']]
+        desenhar(imagem, elemento, escala_x, escala_y)
+    return Image.fromarray(imagem, 'RGBA')
+
+
+def renderizar_varias(pedidos, trabalhadores=None):
+    """Renderiza várias molduras em paralelo
+
+    'pedidos' é uma lista de (especificacao, tamanho, exato); o resultado segue a mesma ordem.
+    """
+    with ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='molduras') as executor:
+        return list(executor.map(lambda pedido: renderizar_moldura(*pedido), pedidos))
+
+
+def _caixa(elemento, imagem, escala_x, escala_y):
+    """Caixa do elemento no tamanho final, com o fim exclusivo: (x0, y0, x1 + 1, y1 + 1)
+
+    Como no ImageDraw, os cantos da 'caixa' fazem parte dela. O padrão é a caixa
+    [0, 0, largura, altura], que passa uma linha e uma coluna da imagem.
+    """
+    altura, largura = imagem.shape[:2]
+    if 'caixa' not in elemento:
+        return 0, 0, largura + 1, altura + 1
+    x0, y0, x1, y1 = elemento['caixa']
+    return (int(round(x0 * escala_x)), int(round(y0 * escala_y)),
+            int(round(x1 * escala_x)) + 1, int(round(y1 * escala_y)) + 1)
+
+
+def _limitar(imagem, x0, y0, x1, y1):
+    """Caixa recortada aos limites da imagem"""
+    altura, largura = imagem.shape[:2]
+    return (min(max(x0, 0), largura), min(max(y0, 0), altura),
+            min(max(x1, 0), largura), min(max(y1, 0), altura))
+
+
+def _espessura(valor, escala):
+    return max(1, int(round(valor * escala))) if valor > 0 else 0
+
+
+def _desenhar_contorno(imagem, elemento, escala_x, escala_y):
+    """Borda retangular (por padrão na beira da imagem)"""
+    # As faixas são medidas na caixa inteira, mesmo a parte fora da imagem (como no ImageDraw)
+    x0, y0, x1, y1 = _caixa(elemento, imagem, escala_x, escala_y)
+    horizontal = _espessura(elemento['largura'], escala_y)
+    vertical = _espessura(elemento['largura'], escala_x)
+    cor = elemento['cor']
+    _preencher(imagem, x0, y0, x1, min(y0 + horizontal, y1), cor)
+    _preencher(imagem, x0, max(y1 - horizontal, y0), x1, y1, cor)
+    _preencher(imagem, x0, y0, min(x0 + vertical, x1), y1, cor)
+    _preencher(imagem, max(x1 - vertical, x0), y0, x1, y1, cor)
+
+
+def _preencher(imagem, x0, y0, x1, y1, cor):
+    """Pinta a parte do retângulo (fim exclusivo) que cai dentro da imagem"""
+    x0, y0, x1, y1 = _limitar(imagem, x0, y0, x1, y1)
+    imagem[y0:y1, x0:x1] = cor
+
+
+def _desenhar_retangulo(imagem, elemento, escala_x, escala_y):
+    """Retângulo preenchido"""
+    _preencher(imagem, *_caixa(elemento, imagem, escala_x, escala_y), elemento['cor'])
+
+
+def _desenhar_elipse(imagem, elemento, escala_x, escala_y):
+    """Elipse preenchida inscrita na caixa (máscara desenhada só no tamanho da caixa)"""
+    x0, y0, x1, y1 = _caixa(elemento, imagem, escala_x, escala_y)
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return
+    _pintar_forma(imagem, x0, y0, x1, y1, elemento['cor'],
+                  lambda desenho: desenho.ellipse([0, 0, x1 - x0 - 1, y1 - y0 - 1], fill=255))
+
+
+def _pintar_forma(imagem, x0, y0, x1, y1, cor, desenhar):
+    """Pinta a forma desenhada pelo ImageDraw em uma máscara do tamanho da caixa (fim exclusivo)
+
+    O ImageDraw rasteriza as bordas exatamente como nas molduras PNG originais.
+    """
+    mascara = Image.new('L', (x1 - x0, y1 - y0), 0)
+    desenhar(ImageDraw.Draw(mascara))
+    lx0, ly0, lx1, ly1 = _limitar(imagem, x0, y0, x1, y1)
+    if lx1 <= lx0 or ly1 <= ly0:
+        return
+    mascara = np.asarray(mascara)[ly0 - y0:ly1 - y0, lx0 - x0:lx1 - x0] > 0
+    imagem[ly0:ly1, lx0:lx1][mascara] = cor
+
+
+def _desenhar_estrelas(imagem, elemento, escala_x, escala_y):
+    """Estrelas distribuídas em círculo ao redor do centro (vértices de todas calculados juntos)"""
+    altura, largura = imagem.shape[:2]
+    quantidade = elemento['quantidade']
+    pontas = elemento.get('pontas', 5)
+    raio_externo = elemento['tamanho'] / 2.0
+    raios = np.where(np.arange(pontas * 2) % 2 == 0, raio_externo, raio_externo / 2.0)
+    angulos_pontas = np.pi / pontas * np.arange(pontas * 2)
+
+    # Centros das estrelas (quantidade x 1) e vértices de todas as estrelas (quantidade x 2*pontas)
+    angulos = 2 * np.pi * np.arange(quantidade) / quantidade
+    # Deslocamentos truncados em pixels inteiros, como na moldura PNG original
+    centro_x = largura // 2 + np.trunc(elemento['raio_orbita'] * escala_x * np.cos(angulos))[:, None]
+    centro_y = altura // 2 + np.trunc(elemento['raio_orbita'] * escala_y * np.sin(angulos))[:, None]
+    xs = centro_x + np.trunc(raios * escala_x * np.sin(angulos_pontas))
+    ys = centro_y - np.trunc(raios * escala_y * np.cos(angulos_pontas))
+    poligonos = np.stack([xs, ys], axis=-1).astype(np.int32)
+
+    for poligono in poligonos:
+        x0, y0 = poligono.min(axis=0)
+        x1, y1 = poligono.max(axis=0) + 1
+        pontos = [tuple(p) for p in (poligono - (x0, y0)).tolist()]
+        _pintar_forma(imagem, int(x0), int(y0), int(x1), int(y1), elemento['cor'],
+                      lambda desenho: desenho.polygon(pontos, fill=255))
+
+
+def _carregar_fonte(nome, tamanho):
+    """Fonte TrueType pedida ou, se não existir, a fonte padrão do Pillow
+
+    A fonte padrão é pedida no tamanho do texto (Pillow 10.1+); a moldura PNG original
+    usava a fonte de bitmap minúscula nesse caso, sem acompanhar o tamanho da moldura.
+    """
+    try:
+        return ImageFont.truetype(nome, tamanho)
+    except IOError:
+        try:
+            return ImageFont.load_default(tamanho)
+        except TypeError:
+            # Pillow antigo: fonte padrão sem tamanho ajustável
+            return ImageFont.load_default()
+
+
+def _desenhar_texto(imagem, elemento, escala_x, escala_y):
+    """Texto centralizado no ponto indicado, misturado pela máscara de cobertura da fonte"""
+    tamanho_fonte = max(1, int(round(elemento.get('tamanho_fonte', 120) * escala_y)))
+    fonte = _carregar_fonte(elemento.get('fonte', 'arial.ttf'), tamanho_fonte)
+    esquerda, topo, direita, base = fonte.getbbox(elemento['texto'])
+    if direita <= esquerda or base <= topo:
+        return
+
+    # Máscara do texto desenhada só no tamanho dele
+    mascara = Image.new('L', (direita - esquerda, base - topo), 0)
+    ImageDraw.Draw(mascara).text((-esquerda, -topo), elemento['texto'], fill=255, font=fonte)
+    mascara = np.asarray(mascara, dtype=np.float32) / 255.0
+
+    # Mesma posição da moldura PNG original: o texto (origem, não a tinta) é que fica centralizado
+    x = int(round(elemento['centro'][0] * escala_x)) + (-mascara.shape[1]) // 2 + esquerda
+    y = int(round(elemento['centro'][1] * escala_y)) - mascara.shape[0] // 2 + topo
+    x0, y0, x1, y1 = _limitar(imagem, x, y, x + mascara.shape[1], y + mascara.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    mascara = mascara[y0 - y:y1 - y, x0 - x:x1 - x, None]
+    regiao = imagem[y0:y1, x0:x1]
+    cor = np.asarray(elemento['cor'], dtype=np.float32)
+    regiao[:] = np.round(cor * mascara + regiao * (1.0 - mascara)).astype(np.uint8)
+
+
+_DESENHOS = {
+    'contorno': _desenhar_contorno,
+    'retangulo': _desenhar_retangulo,
+    'elipse': _desenhar_elipse,
+    'estrelas': _desenhar_estrelas,
+    'texto': _desenhar_texto,
+}
@@ -0,0 +1,201 @@
+"""
+Executor de renderização da cabine fotográfica
+Recebe o frame capturado e a moldura selecionada e compõe a foto final em um pool
+de trabalhadores (threads ou processos), devolvendo um Future, para que a
+interface não fique travada durante a composição. A foto é composta uma única vez,
+já na resolução de impressão, e o preview da tela é uma redução desse resultado.
+O filtro de cor escolhido é aplicado ao frame antes da composição (a moldura não muda).
+A moldura mantém a proporção na impressão: ela é ajustada ao tamanho da folha e
+centralizada sobre fundo branco
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+from PIL import Image
+
+from cache_molduras import CacheMolduras
+from composicao import MolduraPreparada, camada_sobreposicao, celulas_grade, compor, montar_grade
+from filtros import aplicar_filtro
+
+# Cache de molduras de cada processo trabalhador (usado apenas no modo 'processo')
+_cache_processo = None
+
+
+class FotoRenderizada:
+    """Foto composta na resolução de impressão e sua versão reduzida para a tela"""
+
+    def __init__(self, impressao, preview):
+        self.impressao = impressao
+        self.preview = preview
+
+
+class SobreposicaoPreview:
+    """Moldura reduzida para a tela e a geometria da janela, para o preview ao vivo
+
+    'janela' e 'tamanho_moldura' estão em pixels de impressão, os mesmos usados em compor().
+    """
+
+    def __init__(self, preparada, limite):
+        self.tamanho_moldura = preparada.tamanho
+        self.janela = preparada.janela
+        self.rgba = reduzir_para_preview(camada_sobreposicao(preparada), limite)
+        self.nbytes = self.rgba.nbytes
+
+
+def obter_moldura_impressao(cache, caminho_moldura):
+    """Moldura preparada para composição já no tamanho de impressão"""
+    tamanho = cache.tamanhos['impressao']
+    return cache.obter_derivado(
+        caminho_moldura, 'composicao_impressao',
+        lambda moldura: MolduraPreparada(centralizar_na_folha(moldura, tamanho)),
+        variante='impressao'
+    )
+
+
+def centralizar_na_folha(moldura, tamanho):
+    """Coloca a moldura (já ajustada ao tamanho mantendo a proporção) no centro de uma folha branca
+
+    A sobra é branca e opaca, para não ser confundida com a janela transparente da foto.
+    """
+    tamanho = (int(tamanho[0]), int(tamanho[1]))
+    if moldura.size == tamanho:
+        return moldura
+    folha = Image.new('RGBA', tamanho, (255, 255, 255, 255))
+    folha.paste(moldura, ((tamanho[0] - moldura.width) // 2, (tamanho[1] - moldura.height) // 2))
+    return folha
+
+
+def renderizar_foto(cache, frame, caminho_moldura, filtro=None):
+    """Aplica o filtro, compõe o frame com a moldura direto na resolução de impressão e gera o preview"""
+    frame = aplicar_filtro(frame, filtro)
+    impressao = compor(frame, obter_moldura_impressao(cache, caminho_moldura))
+    return FotoRenderizada(impressao, reduzir_para_preview(impressao, cache.tamanhos.get('preview')))
+
+
+def renderizar_celula(cache, frame, caminho_moldura, tamanho_celula, filtro=None):
+    """Aplica o filtro e compõe uma foto da tirinha com a moldura no tamanho da sua célula na folha"""
+    frame = aplicar_filtro(frame, filtro)
+    moldura = cache.obter_derivado(
+        caminho_moldura, 'composicao', MolduraPreparada, variante=tuple(tamanho_celula)
+    )
+    return compor(frame, moldura)
+
+
+def montar_tirinha(celulas, tamanho_folha, colunas, margem, tamanho_preview=None):
+    """Monta as fotos já compostas da tirinha na folha de impressão e gera o preview"""
+    impressao = montar_grade(celulas, tamanho_folha, colunas, margem)
+    return FotoRenderizada(impressao, reduzir_para_preview(impressao, tamanho_preview))
+
+
+def tamanho_celula_tirinha(tamanho_folha, quantidade, colunas, margem):
+    """Tamanho (largura, altura) de cada célula da tirinha"""
+    x, y, largura, altura = celulas_grade(tamanho_folha, quantidade, colunas, margem)[0]
+    return (largura, altura)
+
+
+def reduzir_para_preview(imagem, limite):
+    """Reduz a foto já composta para caber no tamanho de preview (redução barata)"""
+    largura, altura = imagem.shape[1], imagem.shape[0]
+    if limite is None:
+        return imagem
+    ratio = min(1.0, limite[0] / largura, limite[1] / altura)
+    tamanho_preview = (max(1, int(largura * ratio)), max(1, int(altura * ratio)))
+    return cv2.resize(imagem, tamanho_preview, interpolation=cv2.INTER_AREA)
+
+
+def obter_sobreposicao(cache, caminho_moldura, limite):
+    """Camada da moldura para o preview ao vivo, no máximo do tamanho 'limite' (tela)"""
+    limite = tuple(limite)
+    return cache.obter_derivado(
+        caminho_moldura, f"sobreposicao_{limite[0]}x{limite[1]}",
+        lambda moldura: SobreposicaoPreview(obter_moldura_impressao(cache, caminho_moldura), limite),
+        variante='impressao'
+    )
+
+
+def preparar_moldura(cache, caminho_moldura):
+    """Decodifica e prepara a moldura antecipadamente"""
+    obter_moldura_impressao(cache, caminho_moldura)
+
+
+def _iniciar_processo(limite_memoria_mb, tamanhos):
+    """Cria o cache de molduras do processo trabalhador"""
+    global _cache_processo
+    _cache_processo = CacheMolduras(limite_memoria_mb, tamanhos)
+
+
+def _renderizar_no_processo(frame, caminho_moldura, filtro):
+    return renderizar_foto(_cache_processo, frame, caminho_moldura, filtro)
+
+
+def _preparar_no_processo(caminho_moldura):
+    preparar_moldura(_cache_processo, caminho_moldura)
+
+
+def _sobreposicao_no_processo(caminho_moldura, limite):
+    return obter_sobreposicao(_cache_processo, caminho_moldura, limite)
+
+
+def _renderizar_celula_no_processo(frame, caminho_moldura, tamanho_celula, filtro):
+    return renderizar_celula(_cache_processo, frame, caminho_moldura, tamanho_celula, filtro)
+
+
+class ExecutorRender:
+    def __init__(self, cache, modo='thread', trabalhadores=2):
+        self.cache = cache
+        self.modo = modo
+
+        if modo == 'thread':
+            # Threads compartilham o cache de molduras do aplicativo;
+            # o OpenCV e o NumPy liberam o GIL durante o processamento pesado
+            self._executor = ThreadPoolExecutor(
+                max_workers=trabalhadores, thread_name_prefix='render'
+            )
+        elif modo == 'processo':
+            # Cada processo mantém seu próprio cache de molduras
+            self._executor = ProcessPoolExecutor(
+                max_workers=trabalhadores,
+                initializer=_iniciar_processo,
+                initargs=(cache.limite_memoria / (1024 * 1024), cache.tamanhos),
+            )
+        else:
+            raise ValueError(f"Modo de renderização inválido: {modo}")
+
+    def submeter(self, frame, caminho_moldura, filtro=None):
+        """Agenda a composição da foto e retorna um Future com a FotoRenderizada"""
+        if self.modo == 'processo':
+            return self._executor.submit(_renderizar_no_processo, frame, caminho_moldura, filtro)
+        return self._executor.submit(renderizar_foto, self.cache, frame, caminho_moldura, filtro)
+
+    def submeter_celula(self, frame, caminho_moldura, tamanho_celula, filtro=None):
+        """Agenda a composição de uma foto da tirinha e retorna um Future com o array BGR"""
+        if self.modo == 'processo':
+            return self._executor.submit(
+                _renderizar_celula_no_processo, frame, caminho_moldura, tamanho_celula, filtro
+            )
+        return self._executor.submit(
+            renderizar_celula, self.cache, frame, caminho_moldura, tamanho_celula, filtro
+        )
+
+    def submeter_tirinha(self, celulas, tamanho_folha, colunas, margem):
+        """Agenda a montagem da tirinha e retorna um Future com a FotoRenderizada"""
+        return self._executor.submit(
+            montar_tirinha, celulas, tamanho_folha, colunas, margem, self.cache.tamanhos.get('preview')
+        )
+
+    def submeter_sobreposicao(self, caminho_moldura, limite):
+        """Agenda a preparação da camada da moldura do preview ao vivo (Future com SobreposicaoPreview)"""
+        if self.modo == 'processo':
+            return self._executor.submit(_sobreposicao_no_processo, caminho_moldura, limite)
+        return self._executor.submit(obter_sobreposicao, self.cache, caminho_moldura, limite)
+
+    def precarregar(self, caminho_moldura):
+        """Prepara a moldura em segundo plano antes da primeira foto"""
+        if self.modo == 'processo':
+            return self._executor.submit(_preparar_no_processo, caminho_moldura)
+        return self._executor.submit(preparar_moldura, self.cache, caminho_moldura)
+
+    def encerrar(self):
+        """Encerra o pool descartando as tarefas que ainda não começaram"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,354 @@
+"""
+Teste de resistência da cabine fotográfica (sem tela, sem câmera e sem impressora)
+Executa o fluxo completo do PhotoBoothApp (boas-vindas, seleção de moldura, captura,
+composição, preview, gravação e impressão) milhares de vezes com a câmera simulada
+e a impressora virtual, em uma janela do Kivy fora da tela. A cada N atendimentos,
+sempre de volta à tela inicial, mede a memória residente (RSS) e a memória alocada
+pelo Python (tracemalloc) e falha se ela crescer além do limite, mostrando os pontos
+do código que mais alocaram. O crescimento desconta a variação do cache de molduras,
+que tem limite próprio (CACHE_MOLDURAS_MB) e pode ainda estar enchendo
+
+Uso:
+    python teste_resistencia.py                                (2000 ciclos)
+    python teste_resistencia.py --ciclos 200 --saida resistencia.json
+    python teste_resistencia.py --limite-crescimento-mb 50 --limite-rss-mb 1500
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Janela do Kivy fora da tela e sem ler os argumentos da linha de comando
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ['KIVY_NO_ARGS'] = '1'
+
+MB = 1024 * 1024
+
+# Duração máxima de um ciclo antes de considerar o fluxo travado (em segundos)
+TEMPO_MAXIMO_CICLO = 120
+# Espera máxima pela fila de impressão vazia antes de cada medição (em segundos)
+TEMPO_MAXIMO_FILA = 60
+
+
+def rss_mb():
+    """Memória residente atual do processo (None se não for possível medir)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / MB
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def tendencia_mb_por_hora(amostras, chave):
+    """Inclinação (MB/h) da reta de mínimos quadrados das amostras"""
+    pontos = [(a['segundos'], a[chave]) for a in amostras if a.get(chave) is not None]
+    if len(pontos) < 3:
+        return None
+    media_t = sum(t for t, _ in pontos) / len(pontos)
+    media_m = sum(m for _, m in pontos) / len(pontos)
+    variancia = sum((t - media_t) ** 2 for t, _ in pontos)
+    if variancia == 0:
+        return None
+    inclinacao = sum((t - media_t) * (m - media_m) for t, m in pontos) / variancia
+    return round(inclinacao * 3600, 2)
+
+
+def maiores_alocacoes(snapshot, base, quantidade):
+    """Pontos do código cuja memória alocada mais cresceu desde a base"""
+    filtros = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ]
+    diferencas = snapshot.filter_traces(filtros).compare_to(base.filter_traces(filtros), 'traceback')
+    crescimentos = sorted((e for e in diferencas if e.size_diff > 0), key=lambda e: e.size_diff, reverse=True)
+    resultado = []
+    for estatistica in crescimentos[:quantidade]:
+        resultado.append({
+            'crescimento_kb': round(estatistica.size_diff / 1024, 1),
+            'blocos_novos': estatistica.count_diff,
+            'total_kb': round(estatistica.size / 1024, 1),
+            'origem': [f"{quadro.filename}:{quadro.lineno}" for quadro in reversed(estatistica.traceback)],
+        })
+    return resultado
+
+
+class EnsaioResistencia:
+    """Conduz o aplicativo pelo fluxo de atendimento e acompanha a memória"""
+
+    def __init__(self, app, argumentos, pasta):
+        self.app = app
+        self.argumentos = argumentos
+        self.pasta = pasta
+        self.ciclos = 0
+        self.em_ciclo = False
+        self.inicio_ciclo = None
+        self.inicio = time.monotonic()
+        self.amostras = []
+        self.base = None
+        self.snapshot_base = None
+        # Combinações (moldura, tirinha) já atendidas: a base só é marcada depois de todas,
+        # quando as variantes de cada moldura (impressão, preview, célula, sobreposição) já existem
+        self.combinacoes_usadas = set()
+        self.combinacoes = None
+        self.falha = None
+        self.resultado = None
+
+    def iniciar(self):
+        from kivy.clock import Clock
+        Clock.schedule_interval(self.passo, 0.1)
+
+    def passo(self, dt):
+        """Inicia um novo ciclo sempre que o aplicativo volta para a tela de boas-vindas"""
+        from kivy.clock import Clock
+        app = self.app
+        if self.resultado is not None or not app.pronto:
+            return
+        estacao = app.estacoes[0]
+
+        if self.em_ciclo and time.monotonic() - self.inicio_ciclo > TEMPO_MAXIMO_CICLO:
+            self.falha = f"ciclo {self.ciclos + 1} travado na tela '{estacao.current}'"
+            self.finalizar()
+            return
+        if estacao.current != 'welcome':
+            return
+
+        if self.em_ciclo:
+            # O aplicativo voltou ao início: ciclo concluído. As medições são feitas
+            # sempre neste ponto, para comparar o mesmo estado do aplicativo
+            self.em_ciclo = False
+            self.ciclos += 1
+            if self.ciclos >= self.argumentos.ciclos:
+                self.finalizar()
+            elif self.base is None and self.ciclos >= self.argumentos.aquecimento and not self.pendentes():
+                self.marcar_base()
+            elif self.ciclos % self.argumentos.amostrar_a_cada == 0:
+                self.amostrar()
+            return
+
+        # Novo atendimento: cada ciclo usa a próxima moldura da galeria
+        self.em_ciclo = True
+        self.inicio_ciclo = time.monotonic()
+        estacao.welcome_screen.go_to_frame_select(None)
+        molduras = [item['moldura_path'] for item in estacao.frame_select_screen.galeria.data]
+        if not molduras:
+            self.falha = "nenhuma moldura na pasta 'molduras'"
+            self.finalizar()
+            return
+        if self.combinacoes is None:
+            modos = (False, True) if self.argumentos.tirinha_a_cada else (False,)
+            self.combinacoes = [(m, modo) for modo in modos for m in molduras]
+        pendentes = self.pendentes() if self.base is None else []
+        if pendentes:
+            # Aquecimento: primeiro cada moldura em cada modo
+            moldura, tirinha = pendentes[0]
+        else:
+            moldura = molduras[self.ciclos % len(molduras)]
+            tirinha = self.argumentos.tirinha_a_cada and (self.ciclos + 1) % self.argumentos.tirinha_a_cada == 0
+        self.combinacoes_usadas.add((moldura, bool(tirinha)))
+        Clock.schedule_once(lambda dt: estacao.selecionar_moldura(moldura), 0.2)
+        Clock.schedule_once(lambda dt: self.disparar(tirinha), 0.2 + self.argumentos.espera_preview)
+
+    def pendentes(self):
+        """Combinações de moldura e modo ainda não usadas no aquecimento"""
+        if self.combinacoes is None:
+            return [None]
+        return [c for c in self.combinacoes if c not in self.combinacoes_usadas]
+
+    def disparar(self, tirinha):
+        """Aperta o botão de foto (ou de tirinha) na tela de captura"""
+        tela = self.app.estacoes[0].capture_screen
+        if tirinha:
+            tela.on_tirinha(None)
+        else:
+            tela.on_tirar_foto(None)
+
+    def marcar_base(self):
+        """Memória de referência, depois que os caches e as texturas já foram criados"""
+        self.base = self.amostrar()
+        self.snapshot_base = tracemalloc.take_snapshot()
+        print(f"[INFO] Base de memória após {self.ciclos} ciclos: "
+              f"RSS {self.base['rss_mb']} MB, Python {self.base['python_mb']} MB", file=sys.stderr)
+
+    def amostrar(self):
+        """Mede a memória e apaga as fotos e impressões já gravadas (o disco não é o alvo)"""
+        # A folha em impressão não é vazamento: mede com a fila vazia, sempre no mesmo estado
+        fila = self.app.fila_impressao
+        limite = time.monotonic() + TEMPO_MAXIMO_FILA
+        while fila is not None and fila.pendentes() and time.monotonic() < limite:
+            time.sleep(0.1)
+
+        gc.collect()
+        rss = rss_mb()
+        cache = self.app.cache_molduras
+        amostra = {
+            'segundos': round(time.monotonic() - self.inicio, 1),
+            'ciclos': self.ciclos,
+            'rss_mb': round(rss, 1) if rss is not None else None,
+            'python_mb': round(tracemalloc.get_traced_memory()[0] / MB, 1),
+            'cache_molduras_mb': round(cache.uso_memoria / MB, 1) if cache is not None else 0,
+            'objetos': len(gc.get_objects()),
+        }
+        self.amostras.append(amostra)
+        print(f"[INFO] {amostra['ciclos']} ciclos: RSS {amostra['rss_mb']} MB, "
+              f"Python {amostra['python_mb']} MB, cache de molduras {amostra['cache_molduras_mb']} MB, "
+              f"{amostra['objetos']} objetos", file=sys.stderr)
+
+        for pasta in ('impressoes', 'fotos'):
+            for raiz, _, arquivos in os.walk(os.path.join(self.pasta, pasta)):
+                for arquivo in arquivos:
+                    if not arquivo.endswith('.tmp'):
+                        with contextlib.suppress(OSError):
+                            os.remove(os.path.join(raiz, arquivo))
+        return amostra
+
+    def finalizar(self):
+        """Compara a memória final com a base, monta o resultado e encerra o aplicativo"""
+        final = self.amostrar()
+        argumentos = self.argumentos
+        falhas = [self.falha] if self.falha else []
+        resultado = {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'ciclos': self.ciclos,
+            'duracao_s': round(time.monotonic() - self.inicio, 1),
+            'base': self.base,
+            'final': final,
+            'amostras': self.amostras,
+        }
+
+        if self.base is not None:
+            posteriores = [a for a in self.amostras if a['ciclos'] >= self.base['ciclos']]
+            # O cache de molduras tem limite próprio: sua variação não conta como crescimento
+            variacao_cache = final['cache_molduras_mb'] - self.base['cache_molduras_mb']
+            resultado['variacao_cache_molduras_mb'] = round(variacao_cache, 1)
+            crescimento_python = final['python_mb'] - self.base['python_mb'] - variacao_cache
+            resultado['crescimento_python_mb'] = round(crescimento_python, 1)
+            resultado['tendencia_python_mb_h'] = tendencia_mb_por_hora(posteriores, 'python_mb')
+            resultado['crescimento_objetos'] = final['objetos'] - self.base['objetos']
+            if crescimento_python > argumentos.limite_crescimento_mb:
+                falhas.append(f"memória do Python cresceu {crescimento_python:.1f} MB "
+                              f"(limite {argumentos.limite_crescimento_mb} MB)")
+            if final['rss_mb'] is not None and self.base['rss_mb'] is not None:
+                crescimento_rss = final['rss_mb'] - self.base['rss_mb'] - variacao_cache
+                resultado['crescimento_rss_mb'] = round(crescimento_rss, 1)
+                resultado['tendencia_rss_mb_h'] = tendencia_mb_por_hora(posteriores, 'rss_mb')
+                if crescimento_rss > argumentos.limite_crescimento_mb:
+                    falhas.append(f"RSS cresceu {crescimento_rss:.1f} MB "
+                                  f"(limite {argumentos.limite_crescimento_mb} MB)")
+            resultado['maiores_alocacoes'] = maiores_alocacoes(
+                tracemalloc.take_snapshot(), self.snapshot_base, argumentos.alocacoes
+            )
+        elif not falhas:
+            falhas.append(f"o aquecimento ({argumentos.aquecimento} ciclos e "
+                          f"{len(self.combinacoes or [])} combinações de moldura e modo) "
+                          f"não terminou em {self.ciclos} ciclos")
+
+        # Pico de todo o processo (inclusive entre as medições) ou, sem ele, a maior medição
+        from benchmark import pico_rss_mb  # já carrega só módulos usados pela cabine
+        maior_rss = pico_rss_mb() or max(
+            (a['rss_mb'] for a in self.amostras if a['rss_mb'] is not None), default=None
+        )
+        resultado['maior_rss_mb'] = maior_rss
+        if maior_rss is not None and maior_rss > argumentos.limite_rss_mb:
+            falhas.append(f"RSS chegou a {maior_rss:.1f} MB (limite {argumentos.limite_rss_mb} MB)")
+
+        resultado['falhas'] = falhas
+        resultado['aprovado'] = not falhas
+        self.resultado = resultado
+        self.app.stop()
+
+
+def executar(argumentos):
+    """Configura o aplicativo para o teste, executa o fluxo e retorna o resultado"""
+    tracemalloc.start(argumentos.quadros)
+    pasta = tempfile.mkdtemp(prefix='resistencia_cabine_')
+    try:
+        import main
+
+        # Câmera simulada, impressora virtual e todos os arquivos em uma pasta temporária
+        main.CAMERA_FALSA = True
+        main.IMPRESSORA = 'virtual'
+        main.COUNTDOWN_TIME = argumentos.contagem
+        main.PREVIEW_TIME = argumentos.tempo_preview
+        main.PASTA_IMPRESSORA_VIRTUAL = os.path.join(pasta, 'impressoes')
+        main.PASTA_FILA_IMPRESSAO = os.path.join(pasta, 'fila_impressao')
+        main.PASTA_FOTOS = os.path.join(pasta, 'fotos')
+        main.PASTA_METRICAS = os.path.join(pasta, 'metricas')
+        main.PASTA_MINIATURAS = os.path.join(pasta, 'cache_miniaturas')
+        main.PASTA_GALERIA = os.path.join(pasta, 'cache_galeria')
+        main.PORTA_GALERIA = 0  # qualquer porta livre
+
+        app = main.PhotoBoothApp()
+        ensaio = EnsaioResistencia(app, argumentos, pasta)
+        ensaio.iniciar()
+        app.run()
+        if ensaio.resultado is None:
+            # Janela fechada antes do fim
+            ensaio.falha = "aplicativo encerrado antes do fim do teste"
+            ensaio.finalizar()
+        return ensaio.resultado
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de resistência da cabine fotográfica (vazamento de memória)")
+    parser.add_argument('--saida', help="arquivo JSON de saída (padrão: terminal)")
+    parser.add_argument('--ciclos', type=int, default=2000, help="atendimentos completos a executar")
+    parser.add_argument('--aquecimento', type=int, default=20,
+                        help="ciclos mínimos antes da memória de referência; o aquecimento também "
+                             "passa por cada moldura em cada modo (caches e texturas já criados)")
+    parser.add_argument('--tirinha-a-cada', type=int, default=5, help="um ciclo em modo tirinha a cada N (0 = nunca)")
+    parser.add_argument('--contagem', type=int, default=1, help="contagem regressiva em segundos")
+    parser.add_argument('--tempo-preview', type=float, default=0.5, help="tempo de exibição da foto em segundos")
+    parser.add_argument('--espera-preview', type=float, default=0.5,
+                        help="tempo no preview da câmera antes de apertar o botão")
+    parser.add_argument('--amostrar-a-cada', type=int, default=25, help="ciclos entre as medições de memória")
+    parser.add_argument('--limite-crescimento-mb', type=float, default=100,
+                        help="crescimento máximo de memória (RSS e Python) desde a base")
+    parser.add_argument('--limite-rss-mb', type=float, default=2048,
+                        help="memória residente máxima do processo (máquinas de 4 GB)")
+    parser.add_argument('--quadros', type=int, default=10, help="quadros de pilha guardados por alocação")
+    parser.add_argument('--alocacoes', type=int, default=15, help="pontos de alocação listados no resultado")
+    argumentos = parser.parse_args()
+
+    if argumentos.aquecimento >= argumentos.ciclos:
+        parser.error("--aquecimento deve ser menor que --ciclos")
+
+    # Os avisos do aplicativo vão para o stderr; o stdout fica só com o resultado
+    with contextlib.redirect_stdout(sys.stderr):
+        resultado = executar(argumentos)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if argumentos.saida:
+        with open(argumentos.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"[INFO] Resultado gravado em {argumentos.saida}", file=sys.stderr)
+    else:
+        print(texto)
+
+    for falha in resultado['falhas']:
+        print(f"[ERRO] {falha}", file=sys.stderr)
+    for alocacao in resultado.get('maiores_alocacoes', [])[:5]:
+        print(f"[INFO] +{alocacao['crescimento_kb']} KB em {alocacao['origem'][0]}", file=sys.stderr)
+    return 0 if resultado['aprovado'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())